@@ -0,0 +1,90 @@
+"""Compare matrix message encoder throughput with the previous encoder.
+
+Run from the repository root with the scoreboard package importable:
+
+    PYTHONPATH=. python benchmarks/bench_matrix_encoder.py
+"""
+
+import struct
+import timeit
+
+from scoreboard.announce.matrixser import (
+    Color,
+    CommandType,
+    MessageEncoder,
+    SerialMessage,
+)
+
+
+def legacy_encode(to_send):
+    """Encode messages like MatrixControllerSerial did before."""
+    msg_buf = bytes()
+    for message in to_send:
+        section = bytes()
+        section += struct.pack("c", bytes([message.command]))
+
+        for part in message.data:
+            if isinstance(part, int):
+                section += struct.pack("c", bytes([part & 0xFF]))
+            elif isinstance(part, str):
+                section += struct.pack("c", bytes([len(part)]))
+                section += part.encode()
+            elif isinstance(part, Color):
+                r, g, b = part.to_list()
+                section += struct.pack(
+                    "ccc", bytes([r]), bytes([g]), bytes([b])
+                )
+            elif isinstance(part, bool):
+                section += struct.pack(
+                    "c", bytes([1]) if part else bytes([0])
+                )
+
+        section = struct.pack("c", bytes([len(section) + 2])) + section
+        section += struct.pack("c", bytes([0xFF]))
+
+        msg_buf += section
+
+    return msg_buf
+
+
+def announcement_messages():
+    """Get the messages of one announcement frame."""
+    messages = [SerialMessage(CommandType.BEGIN, [])]
+    for row, text in ((0, " Game "), (8, "START ")):
+        for idx, char in enumerate(text):
+            messages.append(
+                SerialMessage(
+                    CommandType.TEXT,
+                    [1 + 5 * idx, row, Color(255, 255, 255), char, 1, False],
+                )
+            )
+    messages.append(SerialMessage(CommandType.END, []))
+    return messages
+
+
+def main(number=20000):
+    """Run benchmark."""
+    messages = announcement_messages()
+    encoder = MessageEncoder()
+    assert bytes(encoder.encode(messages)) == legacy_encode(messages)
+
+    results = {
+        "legacy": timeit.timeit(
+            lambda: legacy_encode(messages), number=number
+        ),
+        "encoder": timeit.timeit(
+            lambda: encoder.encode(messages), number=number
+        ),
+        "encoder, per message": timeit.timeit(
+            lambda: [encoder.encode((message,)) for message in messages],
+            number=number,
+        ),
+    }
+    for name, elapsed in results.items():
+        print(
+            "{:<22} {:>10.0f} frames/s".format(name, number / elapsed)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare remote decoding and dispatch throughput with the previous decoder.
+
+The previous decoder built a str from the payload and unpacked it, which
+only worked under Python 2; the legacy path here copies the payload into
+bytes instead, the closest equivalent that runs.
+
+Run from the repository root with the scoreboard package importable:
+
+    PYTHONPATH=. python benchmarks/bench_remote_decoder.py
+"""
+
+import random
+import struct
+import timeit
+
+from scoreboard.remote.constants import RemoteCommands
+from scoreboard.remote.decoder import RemoteDecoder
+from scoreboard.remote.pair import RemotePairHandler
+from scoreboard.remote.persistence import PERSISTENT_REMOTE_DATA
+
+PAYLOAD_SIZE = 32
+REMOTE_COUNT = 8
+
+
+def legacy_decode(message):
+    """Decode messages like RemoteDecoder did before."""
+    buf = bytes(list(message))
+    remote_id = struct.unpack_from("I", buf, 0)[0]
+    command = message[4]
+    command_data = message[5]
+
+    if remote_id == 0:
+        raise IOError("Invalid message")
+
+    PERSISTENT_REMOTE_DATA.seen(remote_id)
+    if command == RemoteCommands.BATT:
+        PERSISTENT_REMOTE_DATA.upd_data(remote_id, command_data)
+    elif not PERSISTENT_REMOTE_DATA.is_known(remote_id):
+        PERSISTENT_REMOTE_DATA.add_remote(remote_id)
+
+    return remote_id, command, command_data
+
+
+def synthetic_payloads(count, seed=0):
+    """Generate button and battery payloads as the NRF24 chip delivers them.
+
+    The first byte is the STATUS byte shifted out by the chip, which the
+    driver skips with a memoryview.
+    """
+    rng = random.Random(seed)
+    remotes = [rng.randrange(1, 2 ** 32) for _ in range(REMOTE_COUNT)]
+    payloads = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            command, data = RemoteCommands.BATT, rng.randrange(101)
+        else:
+            command = rng.choice(
+                (RemoteCommands.BTN_PRESS, RemoteCommands.BTN_RELEASE)
+            )
+            data = rng.randrange(4)
+        packet = struct.pack("<IBB", rng.choice(remotes), command, data)
+        packet = bytes(1) + packet + bytes(PAYLOAD_SIZE - len(packet))
+        payloads.append(memoryview(packet)[1:])
+
+    return payloads
+
+
+def dispatch(payloads, pair_handler, counts):
+    """Decode payloads and route them like the game engine does."""
+    for payload in payloads:
+        try:
+            message = RemoteDecoder(payload)
+        except IOError:
+            continue
+        if pair_handler.remote_event(message):
+            continue
+        key = (message.remote_id, message.command)
+        counts[key] = counts.get(key, 0) + 1
+
+
+def main(count=10000, number=20):
+    """Run benchmark."""
+    payloads = synthetic_payloads(count)
+    for payload in payloads:
+        decoded = RemoteDecoder(payload)
+        assert legacy_decode(payload) == (
+            decoded.remote_id,
+            decoded.command,
+            decoded.cmd_data,
+        )
+
+    pair_handler = RemotePairHandler()
+    counts = {}
+    results = {
+        "legacy decode": timeit.timeit(
+            lambda: [legacy_decode(payload) for payload in payloads],
+            number=number,
+        ),
+        "decode": timeit.timeit(
+            lambda: [RemoteDecoder.decode(payload) for payload in payloads],
+            number=number,
+        ),
+        "decode + dispatch": timeit.timeit(
+            lambda: dispatch(payloads, pair_handler, counts), number=number
+        ),
+    }
+    for name, elapsed in results.items():
+        print(
+            "{:<20} {:>10.0f} packets/s".format(
+                name, count * number / elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""Measure remote input to score panel latency on simulated hardware.
+
+Drives ChainballGame with virtual_hw=True, injects synthetic radio payloads
+through NRF24Handler._message_callback and reads the score panel commands
+back from the master side of the virtual serial port. Every measured press
+changes a score, and its latency is the time until the panel receives that
+score.
+
+The scoreboard package must be importable, either installed with
+"pip install -e ." or through PYTHONPATH. Run from the repository root (or
+pass --conf), for example:
+
+    PYTHONPATH=. python benchmarks/bench_remote_latency.py --pattern all
+"""
+
+import argparse
+import json
+import os
+import select
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+
+from scoreboard.remote.constants import RemoteCommands
+from scoreboard.score.constants import PlayerScoreCommands
+from scoreboard.util.configfiles import CHAINBALL_CONFIGURATION
+from scoreboard.util.metrics import MetricsRegistry
+
+PAYLOAD_SIZE = 32
+PLAYER_REMOTES = [0x51000 + player for player in range(4)]
+MASTER_REMOTE = 0x52000
+# unpaired remotes used for pairing storms
+STRAY_REMOTES = [0x53000 + idx for idx in range(16)]
+
+# buttons, see conf/remotemap.json
+BTN_INCREASE = 0
+BTN_DECREASE = 1
+
+# how long to wait for the panels to catch up after injecting
+SETTLE_TIMEOUT = 5.0
+
+_REMOTE_MESSAGE = struct.Struct("<IBB")
+
+# panel command -> fixed length, DATA commands carry their own length
+_PANEL_COMMAND_SIZES = {
+    PlayerScoreCommands.CLR: 3,
+    PlayerScoreCommands.SCORE: 4,
+    PlayerScoreCommands.TURN: 3,
+    PlayerScoreCommands.MODE: 4,
+    PlayerScoreCommands.BLINK: 4,
+}
+
+
+def remote_payload(remote_id, command, data):
+    """Build a radio payload."""
+    packet = _REMOTE_MESSAGE.pack(remote_id, command, data)
+    return packet + bytes(PAYLOAD_SIZE - len(packet))
+
+
+def pattern_steady(step):
+    """One player presses at a time."""
+    return [("press", step % 4)]
+
+
+def pattern_simultaneous(step):
+    """All players press at the same moment."""
+    return [("press", player) for player in range(4)]
+
+
+def pattern_battery(step):
+    """Presses while every remote reports its battery level."""
+    batch = [("batt", player) for player in range(4)] * 2
+    batch.insert(len(batch) // 2, ("press", step % 4))
+    return batch
+
+
+def pattern_pairing(step):
+    """Presses among unpaired remotes trying to pair."""
+    batch = [("stray", (step + idx) % len(STRAY_REMOTES)) for idx in range(8)]
+    batch.insert(len(batch) // 2, ("press", step % 4))
+    return batch
+
+
+PATTERNS = {
+    "steady": pattern_steady,
+    "simultaneous": pattern_simultaneous,
+    "battery": pattern_battery,
+    "pairing": pattern_pairing,
+}
+
+
+class PanelMonitor(threading.Thread):
+    """Read score panel commands and match them to pending presses."""
+
+    def __init__(self, fd):
+        """Initialize."""
+        super().__init__(daemon=True)
+        self._fd = fd
+        self._halt = threading.Event()
+        self._lock = threading.Lock()
+        self._buf = bytearray()
+        # player -> deque of (injection time, expected score)
+        self._pending = {player: deque() for player in range(4)}
+        self.latencies = []
+        self.last_update = None
+
+    def expect(self, player, injected, score):
+        """Register a press that should show a score."""
+        with self._lock:
+            self._pending[player].append((injected, score))
+
+    def outstanding(self):
+        """Get how many presses have not reached the panels."""
+        with self._lock:
+            return sum(len(pending) for pending in self._pending.values())
+
+    def drop_outstanding(self):
+        """Forget presses that never reached the panels."""
+        with self._lock:
+            lost = 0
+            for pending in self._pending.values():
+                lost += len(pending)
+                pending.clear()
+            return lost
+
+    def stop(self):
+        """Stop reading."""
+        self._halt.set()
+
+    def _score_shown(self, player, score, now):
+        pending = self._pending.get(player)
+        if not pending or all(expected != score for _, expected in pending):
+            return
+        # presses coalesced into this update are shown now as well
+        while pending:
+            injected, expected = pending.popleft()
+            self.latencies.append(now - injected)
+            if expected == score:
+                break
+        self.last_update = now
+
+    def _parse(self, now):
+        buf = self._buf
+        while len(buf) >= 3:
+            command = buf[1]
+            if command == PlayerScoreCommands.DATA:
+                size = 4 + buf[2]
+            else:
+                size = _PANEL_COMMAND_SIZES.get(command)
+                if size is None:
+                    # out of sync, resynchronize after the next terminator
+                    end = buf.find(bytes([PlayerScoreCommands.TERM]))
+                    del buf[: end + 1 if end >= 0 else len(buf)]
+                    continue
+            if len(buf) < size:
+                break
+            if command == PlayerScoreCommands.SCORE:
+                with self._lock:
+                    self._score_shown(buf[0], buf[2] - 10, now)
+            del buf[:size]
+
+    def run(self):
+        """Run monitor."""
+        while not self._halt.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.1)
+            if not ready:
+                continue
+            data = os.read(self._fd, 4096)
+            now = time.monotonic()
+            self._buf += data
+            self._parse(now)
+
+
+class GameLoop(threading.Thread):
+    """Run the game loop like the scoreboard does."""
+
+    def __init__(self, game, wakeup):
+        """Initialize."""
+        super().__init__(daemon=True)
+        self._game = game
+        self._wakeup = wakeup
+        self._halt = threading.Event()
+
+    def stop(self):
+        """Stop loop."""
+        self._halt.set()
+        self._wakeup.post()
+
+    def run(self):
+        """Run loop."""
+        while not self._halt.is_set():
+            self._game.game_loop()
+            self._wakeup.wait(1.0)
+
+
+def _update_json(path, values):
+    data = {}
+    if os.path.exists(path):
+        with open(path, "r") as fobj:
+            data = json.load(fobj)
+    data.update(values)
+    with open(path, "w") as fobj:
+        json.dump(data, fobj)
+
+
+def prepare_configuration(conf_path, workdir):
+    """Load configuration with outputs redirected to a scratch directory."""
+    scratch_conf = os.path.join(workdir, "conf")
+    shutil.copytree(conf_path, scratch_conf)
+    _update_json(
+        os.path.join(scratch_conf, "scoreboard.json"),
+        {
+            "audio_sink": "null",
+            "live_updates": False,
+            "chainball_server": "",
+            "chainball_server_token": "",
+        },
+    )
+    _update_json(
+        os.path.join(scratch_conf, "db.json"),
+        {"database_location": os.path.join(workdir, "db")},
+    )
+    CHAINBALL_CONFIGURATION.reload_configuration(scratch_conf)
+    if not CHAINBALL_CONFIGURATION.configuration_loaded:
+        raise SystemExit("cannot load configuration from {}".format(conf_path))
+
+
+def run_pattern(game, monitor, name, rate, count):
+    """Inject a pattern and collect results."""
+    pattern = PATTERNS[name]
+    callback = game.rf_handler._message_callback
+    scores = {
+        player: game.players[player].current_score for player in range(4)
+    }
+    monitor.latencies = []
+    monitor.last_update = None
+    injected = 0
+    presses = 0
+
+    cpu_start = time.process_time()
+    start = time.monotonic()
+    for step in range(count):
+        if rate > 0:
+            delay = start + step / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        for kind, target in pattern(step):
+            if kind == "press":
+                # alternate so that scores stay within bounds
+                if scores[target] > 0:
+                    button, scores[target] = BTN_DECREASE, scores[target] - 1
+                else:
+                    button, scores[target] = BTN_INCREASE, scores[target] + 1
+                payload = remote_payload(
+                    PLAYER_REMOTES[target], RemoteCommands.BTN_PRESS, button
+                )
+                monitor.expect(target, time.monotonic(), scores[target])
+                presses += 1
+            elif kind == "batt":
+                payload = remote_payload(
+                    PLAYER_REMOTES[target], RemoteCommands.BATT, 50 + step % 50
+                )
+            else:
+                payload = remote_payload(
+                    STRAY_REMOTES[target], RemoteCommands.BTN_PRESS, 0
+                )
+            callback(payload)
+            injected += 1
+
+    injection_end = time.monotonic()
+
+    settle = time.monotonic() + SETTLE_TIMEOUT
+    while monitor.outstanding() and time.monotonic() < settle:
+        time.sleep(0.01)
+    cpu = time.process_time() - cpu_start
+    lost = monitor.drop_outstanding()
+
+    latencies = sorted(monitor.latencies)
+    end = max(monitor.last_update or 0.0, injection_end)
+    return {
+        "pattern": name,
+        "payloads": injected,
+        "presses": presses,
+        "lost": lost,
+        "latencies": latencies,
+        "events_per_s": injected / max(end - start, 1e-9),
+        "cpu_per_event": cpu / max(injected, 1),
+    }
+
+
+def report(result):
+    """Print pattern results."""
+    latencies = result["latencies"]
+
+    def pct(value):
+        found = MetricsRegistry.percentile(latencies, value)
+        if found is None:
+            return "     -"
+        return "{:6.1f}".format(found * 1000)
+
+    print(
+        "{:<13} {:>6} {:>5} {} {} {} {} {:>9.0f} {:>8.1f}".format(
+            result["pattern"],
+            result["presses"],
+            result["lost"],
+            pct(50),
+            pct(90),
+            pct(99),
+            pct(100),
+            result["events_per_s"],
+            result["cpu_per_event"] * 1e6,
+        )
+    )
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pattern", choices=sorted(PATTERNS) + ["all"], default="all"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=20.0,
+        help="batches per second, 0 injects as fast as possible",
+    )
+    parser.add_argument(
+        "--count", type=int, default=200, help="batches per pattern"
+    )
+    parser.add_argument(
+        "--conf",
+        default=os.path.join(os.getcwd(), "conf"),
+        help="configuration path",
+    )
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sboard-bench-")
+    prepare_configuration(args.conf, workdir)
+    # relative paths used by the scoreboard end up in the scratch directory
+    os.chdir(workdir)
+
+    # the engine reads configuration at import time
+    from scoreboard.game.engine import MASTER_REMOTE_ROUTE, ChainballGame
+    from scoreboard.game.playertxt import PlayerText
+    from scoreboard.ipc.server import IPC_HANDLER
+    from scoreboard.util.wakeup import GAME_WAKEUP
+
+    # game events are published over IPC
+    IPC_HANDLER.start_handler()
+    game = ChainballGame(virtual_hw=True, remote_score=True)
+    monitor = PanelMonitor(game.s_handler.master_port)
+    monitor.start()
+    loop = GameLoop(game, GAME_WAKEUP)
+    loop.start()
+
+    try:
+        game.register_players(
+            {player: PlayerText("P{}".format(player)) for player in range(4)}
+        )
+        for player, remote_id in enumerate(PLAYER_REMOTES):
+            game.pair_end(player, remote_id)
+        game.pair_end(MASTER_REMOTE_ROUTE, MASTER_REMOTE)
+        game.game_begin()
+        GAME_WAKEUP.post()
+        # let the initial panel updates go out
+        time.sleep(0.5)
+
+        if args.pattern == "all":
+            patterns = list(PATTERNS)
+        else:
+            patterns = [args.pattern]
+
+        print(
+            "{:<13} {:>6} {:>5} {:>6} {:>6} {:>6} {:>6} {:>9} {:>8}".format(
+                "pattern",
+                "press",
+                "lost",
+                "p50ms",
+                "p90ms",
+                "p99ms",
+                "maxms",
+                "events/s",
+                "cpu us",
+            )
+        )
+        for name in patterns:
+            report(run_pattern(game, monitor, name, args.rate, args.count))
+    finally:
+        loop.stop()
+        loop.join()
+        monitor.stop()
+        monitor.join()
+        game.shutdown()
+        IPC_HANDLER.stop_handler()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
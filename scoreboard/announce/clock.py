@@ -0,0 +1,153 @@
+"""Game clock."""
+
+import math
+import time
+
+from scoreboard.util.wakeup import GAME_WAKEUP
+
+# timer cycle period, in seconds
+_TICK_PERIOD = 1.0
+
+
+class GameClock:
+    """Game clock, shared by the timer displays.
+
+    The clock runs timer cycles of every subscribed display. While the clock
+    runs, cycles happen whenever the remaining time crosses a whole second.
+    """
+
+    def __init__(self, timer_end=None):
+        """Initialize.
+
+        Args
+        ----
+        timer_end: callable
+           Called when the clock runs out
+        """
+        self.stopped = True
+        self.paused = False
+        self.timer_end = None
+        self.pause_timer = None
+        self.end_cb = timer_end
+
+        # cycle deadlines, in time.monotonic() seconds
+        self.next_tick = time.monotonic()
+        self.tick_time = self.next_tick
+
+        self._displays = []
+
+    def subscribe(self, display):
+        """Run timer cycles of a display.
+
+        Args
+        ----
+        display: TimerHandler
+           Display to drive
+        """
+        self._displays.append(display)
+
+    @property
+    def running(self):
+        """Get whether the clock is counting down."""
+        return not (self.stopped or self.paused)
+
+    @property
+    def active(self):
+        """Get whether timer cycles are needed."""
+        if self.running:
+            return True
+
+        return any(display.active for display in self._displays)
+
+    def start(self, minutes):
+        """Start clock."""
+        now = time.monotonic()
+        self.timer_end = now + minutes * 60
+        self.pause_timer = None
+        self.next_tick = now + _TICK_PERIOD
+        self.paused = False
+        self.stopped = False
+        self.schedule_tick()
+
+    def pause(self):
+        """Pause clock."""
+        self.paused = True
+
+        self.pause_timer = self.timer_end - time.monotonic()
+
+    def unpause(self):
+        """Unpause clock."""
+        now = time.monotonic()
+        self.timer_end = now + self.pause_timer
+        self.next_tick = now + self.pause_timer % _TICK_PERIOD
+        self.pause_timer = None
+
+        self.paused = False
+        self.schedule_tick()
+
+    def stop(self):
+        """Stop clock, keeping the remaining time."""
+        if self.running:
+            self.pause_timer = self.timer_end - time.monotonic()
+        self.stopped = True
+
+    def get_timer(self):
+        """Get remaining time in seconds."""
+        if self.timer_end is None or self.stopped:
+            return None
+
+        if self.paused:
+            return self.pause_timer
+
+        return self.timer_end - time.monotonic()
+
+    def get_remaining_seconds(self):
+        """Get remaining time in seconds, with millisecond resolution."""
+        if self.timer_end is None:
+            return 0.0
+
+        if self.running:
+            remaining = self.timer_end - time.monotonic()
+        else:
+            remaining = self.pause_timer
+
+        return max(round(remaining, 3), 0.0)
+
+    def get_remaining_time(self):
+        """Get remaining time as displayed, (minutes, seconds)."""
+        # count down: a second is displayed until it has fully elapsed
+        remaining = math.ceil(self.get_remaining_seconds())
+        minutes, seconds = divmod(remaining, 60)
+
+        return (minutes % 60, seconds)
+
+    def schedule_tick(self):
+        """Schedule a game loop wakeup for the next timer cycle."""
+        GAME_WAKEUP.schedule_at(self.next_tick)
+
+    def handle(self):
+        """Run timer cycle if due."""
+        now = time.monotonic()
+        if now < self.next_tick:
+            return
+
+        if self.running:
+            # advance by whole periods so that cycles stay aligned to the
+            # game clock, skipping cycles that were missed
+            missed = math.floor((now - self.next_tick) / _TICK_PERIOD)
+            self.tick_time = self.next_tick + missed * _TICK_PERIOD
+        else:
+            # no game clock to follow
+            self.tick_time = now
+        self.next_tick = self.tick_time + _TICK_PERIOD
+
+        for display in self._displays:
+            display.handle_cycle()
+
+        if self.running and round(self.timer_end - self.tick_time, 3) <= 0:
+            self.stop()
+            if self.end_cb:
+                self.end_cb()
+
+        if self.active:
+            self.schedule_tick()
@@ -1,10 +1,11 @@
 """Serial LED Matrix controller."""
 
 import serial
-import struct
 import time
 import logging
 
+from scoreboard.util.metrics import METRICS
+
 
 class CommandType:
     """Matrix command types."""
@@ -52,6 +53,110 @@ class SerialMessage:
         self.data = data
 
 
+def text_message(color, x, y, text, font, clear=False):
+    """Build text drawing message."""
+    return SerialMessage(CommandType.TEXT, [x, y, color, text, font, clear])
+
+
+class _FieldKind:
+    """Encoding of message fields."""
+
+    BYTE = 0
+    BOOL = 1
+    STR = 2
+    COLOR = 3
+
+
+# exact field type -> encoding
+_FIELD_KINDS = {
+    int: _FieldKind.BYTE,
+    bool: _FieldKind.BOOL,
+    str: _FieldKind.STR,
+    Color: _FieldKind.COLOR,
+}
+
+
+def _field_kind(part):
+    """Get encoding of a message field."""
+    kind = _FIELD_KINDS.get(type(part))
+    if kind is not None:
+        return kind
+
+    # subclasses, bool is a subclass of int so check it first
+    if isinstance(part, bool):
+        return _FieldKind.BOOL
+    if isinstance(part, int):
+        return _FieldKind.BYTE
+    if isinstance(part, str):
+        return _FieldKind.STR
+    if isinstance(part, Color):
+        return _FieldKind.COLOR
+
+    raise TypeError("cannot encode {}".format(type(part)))
+
+
+class MessageEncoder:
+    """Encodes messages into a reusable buffer.
+
+    Frames are laid out as [length, command, fields..., 0xFF], where length
+    counts the whole frame.
+    """
+
+    FRAME_END = 0xFF
+
+    def __init__(self, size=256):
+        """Initialize."""
+        self._buffer = bytearray(size)
+
+    def _reserve(self, size):
+        """Make sure the buffer holds at least size bytes."""
+        if size > len(self._buffer):
+            padding = bytes(size - len(self._buffer))
+            try:
+                self._buffer.extend(padding)
+            except BufferError:
+                # a view from a previous call is still alive
+                self._buffer = self._buffer + padding
+
+    def encode(self, messages):
+        """Encode messages.
+
+        Returns a view of the internal buffer, valid until the next call.
+        """
+        buf = self._buffer
+        pos = 0
+        for message in messages:
+            # worst case, all fields are maximum length strings
+            self._reserve(pos + 3 + 256 * len(message.data))
+            buf = self._buffer
+            start = pos
+            buf[pos + 1] = message.command
+            pos += 2
+            for part in message.data:
+                kind = _field_kind(part)
+                if kind == _FieldKind.BYTE:
+                    buf[pos] = part & 0xFF
+                    pos += 1
+                elif kind == _FieldKind.COLOR:
+                    buf[pos] = part.r
+                    buf[pos + 1] = part.g
+                    buf[pos + 2] = part.b
+                    pos += 3
+                elif kind == _FieldKind.STR:
+                    text = part.encode()
+                    buf[pos] = len(text)
+                    buf[pos + 1 : pos + 1 + len(text)] = text
+                    pos += 1 + len(text)
+                else:
+                    buf[pos] = 1 if part else 0
+                    pos += 1
+            buf[pos] = self.FRAME_END
+            pos += 1
+            buf[start] = pos - start
+
+        return memoryview(buf)[:pos]
+
+
 class MatrixControllerSerial:
     """Matrix controller."""
 
@@ -68,6 +173,9 @@ class MatrixControllerSerial:
 
         self.do_group = None
         self.message_buffer = []
+        self._encoder = MessageEncoder()
+        # total bytes sent
+        self.bytes_sent = 0
 
     def group_messages(self, amount):
         """Set message group size."""
@@ -92,37 +200,29 @@ class MatrixControllerSerial:
             self.message_buffer = []
             self.do_group = None
         else:
-            to_send = [msg]
-
-        msg_buf = bytes()
-        for message in to_send:
-            section = bytes()
-            section += struct.pack("c", bytes([message.command]))
+            to_send = (msg,)
 
-            for part in message.data:
-                if isinstance(part, int):
-                    section += struct.pack("c", bytes([part & 0xFF]))
-                elif isinstance(part, str):
-                    section += struct.pack("c", bytes([len(part)]))
-                    section += part.encode()
-                elif isinstance(part, Color):
-                    r, g, b = part.to_list()
-                    section += struct.pack(
-                        "ccc", bytes([r]), bytes([g]), bytes([b])
-                    )
-                elif isinstance(part, bool):
-                    section += struct.pack(
-                        "c", bytes([1]) if part else bytes([0])
-                    )
-
-            section = struct.pack("c", bytes([len(section) + 2])) + section
-            section += struct.pack("c", bytes([0xFF]))
-
-            msg_buf += section
+        msg_buf = self._encoder.encode(to_send)
 
+        self.bytes_sent += len(msg_buf)
+        METRICS.increment("matrix.bytes", len(msg_buf))
         if self.ser_port is not None:
             self.ser_port.write(msg_buf)
 
+    def encode_screen(self, messages):
+        """Encode a whole screen, to be sent later with send_encoded."""
+        screen = [SerialMessage(CommandType.BEGIN, [])]
+        screen.extend(messages)
+        screen.append(SerialMessage(CommandType.END, []))
+        return bytes(self._encoder.encode(screen))
+
+    def send_encoded(self, data):
+        """Send pre-encoded messages in a single write."""
+        self.bytes_sent += len(data)
+        METRICS.increment("matrix.bytes", len(data))
+        if self.ser_port is not None:
+            self.ser_port.write(data)
+
     def setPixel(self, x, y, color):
         """Set a pixel value in the matrix."""
         message = SerialMessage(CommandType.SETPIXEL, [x, y, color])
@@ -130,10 +230,7 @@ class MatrixControllerSerial:
 
     def putText(self, color, x, y, text, font, clear=False):
         """Draw text in the matrix."""
-        message = SerialMessage(
-            CommandType.TEXT, [x, y, color, text, font, clear]
-        )
-        self._send_message(message)
+        self._send_message(text_message(color, x, y, text, font, clear))
 
     def fill(self, color):
         """Fill matrix."""
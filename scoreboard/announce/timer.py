@@ -1,10 +1,27 @@
 """Game timer controller."""
 
-import datetime
 import logging
-from collections import deque
+from collections import OrderedDict, deque
 
-from scoreboard.announce.matrixser import Color, MatrixControllerSerial
+from scoreboard.announce.matrixser import (
+    Color,
+    MatrixControllerSerial,
+    text_message,
+)
+from scoreboard.util.metrics import METRICS
+
+# timer layout, region -> (x, y, font)
+_TIMER_REGIONS = {
+    "min_tens": (0, 1, 2),
+    "min_units": (11, 1, 2),
+    "seconds": (21, 0, 1),
+}
+
+# announcement colors
+_HEADING_COLOR = (255, 255, 255)
+_TEXT_COLOR = (0, 255, 255)
+# encoded announcement screens kept in memory
+_ANNOUNCEMENT_CACHE_SIZE = 32
 
 
 class AnnouncementKind:
@@ -26,10 +43,24 @@ class TimerAnnouncement:
 
 
 class TimerHandler:
-    """Timer panel controller."""
-
-    def __init__(self, timer_end=None, chainball_game=None, rgbmat=True):
-        """Initialize."""
+    """Timer display controller.
+
+    Displays follow a shared GameClock, and each has its own announcement
+    queue.
+    """
+
+    def __init__(self, clock, chainball_game=None, rgbmat=True):
+        """Initialize.
+
+        Args
+        ----
+        clock: GameClock
+           Game clock to display
+        chainball_game: ChainballGame
+           Game, for player panel announcements
+        rgbmat: bool
+           Whether the display is the RGB matrix
+        """
         if rgbmat:
             self.logger = logging.getLogger("sboard.timer")
         else:
@@ -41,17 +72,13 @@ class TimerHandler:
         else:
             self.matCli = None
 
-        self.stopped = True
-        self.paused = False
+        self.clock = clock
         self.announcing = False
         self.powered_off = False
         # END STATES
         self.a_msg = None
         self.a_duration = None
         self.a_start = None
-        self.pause_timer = None
-        self.timer_end = None
-        self.end_cb = timer_end
         self.a_kind = None
         self.a_player = None
 
@@ -59,70 +86,48 @@ class TimerHandler:
         # NEEDS DECOUPLING
         self.game = chainball_game
 
-        self.last_cycle = datetime.datetime.now()
-
         # announcement queue
         self.a_queue = deque()
 
+        # what the matrix currently shows, region -> contents
+        self._frame = {}
+        # encoded announcement screens by (heading, text, colors)
+        self._announcements = OrderedDict()
+
+        clock.subscribe(self)
+
     def setup(self, minutes, seconds=0):
         """Set default state."""
         self.draw(minutes, seconds)
 
-    def start(self, minutes):
-        """Start timer."""
-        now = datetime.datetime.now()
-        self.last_cycle = now
-        self.timer_end = now + datetime.timedelta(minutes=minutes)
-        self.stopped = False
-
-    def pause(self):
-        """Pause timer."""
-        self.paused = True
-
-        self.pause_timer = self.timer_end - datetime.datetime.now()
-
-    def unpause(self):
-        """Unpause timer."""
-        self.timer_end = datetime.datetime.now() + self.pause_timer
-        self.pause_timer = None
-
-        self.paused = False
+    @property
+    def active(self):
+        """Get whether announcements need timer cycles."""
+        return self.announcing or len(self.a_queue) > 0
 
-    def stop(self, clear=False):
-        """Stop timer."""
-        self.stopped = True
-        if clear:
-            if self.matCli:
-                self.matCli.clear()
-
-    def get_timer(self):
-        """Get current timer value."""
-        if self.timer_end is None or self.stopped:
-            return None
-
-        if self.paused:
-            return self.pause_timer
-
-        return self.timer_end - datetime.datetime.now()
-
-    def handle(self):
-        """Do main timer logic."""
-        td = datetime.datetime.now() - self.last_cycle
-        if td.seconds < 1:
-            return
-
-        self.last_cycle = datetime.datetime.now()
+    def handle_cycle(self):
+        """Do timer logic once per clock cycle."""
+        if self.matCli:
+            sent = self.matCli.bytes_sent
+            self._handle_cycle()
+            METRICS.observe(
+                "timer.serial_bytes", self.matCli.bytes_sent - sent
+            )
+        else:
+            self._handle_cycle()
 
+    def _handle_cycle(self):
+        """Do timer logic once per cycle."""
         if self.announcing:
             if self.a_kind == AnnouncementKind.TIMER_PANEL:
                 self.draw_announcement()
             elif self.a_kind == AnnouncementKind.PLAYER_PANEL:
                 self.game.players[self.a_player].show_text(self.a_msg.text)
-            td = datetime.datetime.now() - self.a_start
-            if td.seconds >= self.a_duration:
+            elapsed = round(self.clock.tick_time - self.a_start, 3)
+            if elapsed >= self.a_duration:
                 self.logger.debug(
                     "Announcement ends: delta = {},"
-                    " duration = {}".format(td.seconds, self.a_duration)
+                    " duration = {}".format(elapsed, self.a_duration)
                 )
 
                 if self.a_kind == AnnouncementKind.PLAYER_PANEL:
@@ -145,20 +150,12 @@ class TimerHandler:
                 # hack hack hack hack
                 self._announcement(*self.a_queue.popleft())
 
-        if self.stopped or self.powered_off or self.paused:
+        if not self.clock.running or self.powered_off:
             return
 
         if self.matCli:
             self.refresh_matrix()
 
-        diff = self.timer_end - datetime.datetime.now()
-        if diff.seconds == 0:
-            self.stopped = True
-            self.refresh_matrix()
-            if self.end_cb:
-                self.end_cb()
-                return
-
     def draw(self, minutes, seconds):
         """Draw timer text."""
         if minutes > 9:
@@ -182,33 +179,92 @@ class TimerHandler:
         if m_g < 0:
             m_g = 0
 
-        self.matCli.putText(Color(m_r, m_g, 0), 0, 1, min_str[0], 2, clear=True)
-        self.matCli.putText(Color(m_r, m_g, 0), 11, 1, min_str[1], 2)
-        self.matCli.putText(Color(255, 0, 0), 21, 0, sec_str, 1)
+        self._render(
+            {
+                "min_tens": (min_str[0], (m_r, m_g, 0)),
+                "min_units": (min_str[1], (m_r, m_g, 0)),
+                "seconds": (sec_str, (255, 0, 0)),
+            }
+        )
+
+    def _render(self, frame):
+        """Send regions that differ from what the matrix shows."""
+        if self._frame.keys() == frame.keys():
+            changed = [
+                region
+                for region, contents in frame.items()
+                if self._frame.get(region) != contents
+            ]
+            redraw = False
+        else:
+            # matrix contents unknown, redraw everything
+            changed = list(frame)
+            redraw = True
+
+        if not changed:
+            return
+
+        for idx, region in enumerate(changed):
+            x, y, font = _TIMER_REGIONS[region]
+            text, color = frame[region]
+            if not redraw:
+                # erase previous contents by drawing them again in black
+                self.matCli.putText(
+                    Color(0, 0, 0), x, y, self._frame[region][0], font
+                )
+            self.matCli.putText(
+                Color(*color), x, y, text, font, clear=redraw and idx == 0
+            )
         self.matCli.end_screen()
+        self._frame = frame
 
     def draw_announcement(self):
         """Draw announcement."""
-        self.matCli.begin_screen()
+        key = (
+            self.a_msg.heading,
+            self.a_msg.text,
+            _HEADING_COLOR,
+            _TEXT_COLOR,
+        )
+        frame = {"announcement": key}
+        if self._frame == frame:
+            # already showing
+            return
+
+        screen = self._announcements.get(key)
+        if screen is None:
+            screen = self._encode_announcement(*key)
+            self._announcements[key] = screen
+            if len(self._announcements) > _ANNOUNCEMENT_CACHE_SIZE:
+                self._announcements.popitem(last=False)
+        else:
+            self._announcements.move_to_end(key)
 
+        self.matCli.send_encoded(screen)
+        self._frame = frame
+
+    def _encode_announcement(self, heading, text, heading_color, text_color):
+        """Encode announcement screen."""
+        messages = []
         xoff = 1
-        text = "{:^6}".format(self.a_msg.heading)
-        for c in text:
-            self.matCli.putText(Color(255, 255, 255), xoff, 0, c, 1)
+        for c in "{:^6}".format(heading):
+            messages.append(text_message(Color(*heading_color), xoff, 0, c, 1))
             xoff += 5
 
-        if len(self.a_msg.text) > 0:
+        if len(text) > 0:
             xoff = 1
             # format
-            text = "{:^6}".format(self.a_msg.text)
-            for c in text:
-                self.matCli.putText(Color(0, 255, 255), xoff, 8, c, 1)
+            for c in "{:^6}".format(text):
+                messages.append(
+                    text_message(Color(*text_color), xoff, 8, c, 1)
+                )
                 xoff += 5
 
-        self.matCli.end_screen()
+        return self.matCli.encode_screen(messages)
 
     def poweroff_matrix(self):
         """Turn matrix off."""
+        self._frame = {}
         self.matCli.begin_screen()
         self.matCli.end_screen()
         self.powered_off = True
@@ -217,33 +273,22 @@ class TimerHandler:
         """Turn matrix on."""
         self.powered_off = False
 
-    def get_remaining_time(self):
-        """Get remaining time."""
-        timer = self.timer_end - datetime.datetime.now()
-
-        if timer.days < 0:
-            minutes = 0
-            seconds = 0
-        else:
-            hours, remainder = divmod(timer.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-
-        return (minutes, seconds)
-
     def refresh_matrix(self):
         """Refresh matrix."""
-        self.draw(*self.get_remaining_time())
+        self.draw(*self.clock.get_remaining_time())
 
     # hack hack hack hack
     def announcement(self, announcement, duration):
         """Do announcement."""
         self.logger.debug("queuing announcement")
         self.a_queue.append([announcement, duration, -1])
+        self.clock.schedule_tick()
 
     def player_announcement(self, announcement, duration, player_number):
         """Do announcement on player panels."""
         self.logger.debug("queuing player announcement")
         self.a_queue.append([announcement, duration, player_number])
+        self.clock.schedule_tick()
 
     def _announcement(self, announcement, duration, player_panel):
 
@@ -261,5 +306,5 @@ class TimerHandler:
 
         self.a_msg = announcement
         self.a_duration = duration
-        self.a_start = datetime.datetime.now()
+        self.a_start = self.clock.tick_time
         self.announcing = True
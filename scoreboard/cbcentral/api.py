@@ -1,14 +1,20 @@
 """Server API access."""
 
+import hashlib
+import json
+import logging
+import os
 import posixpath
+import threading
 import time
-from collections import deque
 
-import requests
 from requests.exceptions import ConnectionError, Timeout
 
 import scoreboard.cbcentral.localdb as localdb
+from scoreboard.cbcentral.outbox import OutboxError, PostOutbox
+from scoreboard.cbcentral.session import make_session
 from scoreboard.util.configfiles import CHAINBALL_CONFIGURATION
+from scoreboard.util.metrics import METRICS
 from scoreboard.util.threads import StoppableThread
 
 
@@ -20,13 +26,39 @@ class CBCentralAPITimeout(CBCentralAPIError):
     """Timeout."""
 
 
+class CBCentralAPIUnreachable(CBCentralAPIError):
+    """Could not connect to the server."""
+
+
+class CBCentralAPINotModified(Exception):
+    """Resource has not changed since last conditional request."""
+
+
 class ChainballCentralAPI(StoppableThread):
     """Central API."""
 
-    def __init__(self):
-        """Initialize."""
+    # validators of last conditional GET, by URL: (etag, last modified, hash)
+    _get_validators = {}
+
+    # keep-alive sessions, one per thread as sessions are not thread safe
+    _sessions = threading.local()
+
+    def __init__(self, outbox_path=None):
+        """Initialize.
+
+        Args
+        ----
+        outbox_path: str
+           Outbox database path, defaults to the location in db config
+        """
         super().__init__()
-        self._outgoing_queue = deque()
+        self.logger = logging.getLogger("sboard.central")
+        if outbox_path is None:
+            db_config = CHAINBALL_CONFIGURATION.db
+            outbox_path = os.path.join(
+                db_config.database_location, db_config.central_outbox
+            )
+        self._outbox = PostOutbox(outbox_path)
 
     def run(self):
         """Run."""
@@ -38,26 +70,104 @@ class ChainballCentralAPI(StoppableThread):
                 localdb.GAME_REGISTRY.commit_registry()
             except CBCentralAPIError:
                 pass
+
+            scoreboard_config = CHAINBALL_CONFIGURATION.scoreboard
+            batch_size = scoreboard_config.get("live_batch_size", 32)
+            flush_interval = scoreboard_config.get("live_flush_interval", 1.0)
             while not self.is_stopped():
-                # drop everything
+                # send everything that is due
                 try:
-                    data, sub_api, path, retry = self._outgoing_queue.popleft()
-                    result = self._central_api_post(
-                        data=data, sub_api=sub_api, path=path
-                    )
-                    if "status" not in result or result["status"] != "ok":
-                        raise CBCentralAPIError()
-                except IndexError:
+                    if not self._send_next(batch_size):
+                        break
+                except OutboxError:
                     break
-                except (CBCentralAPITimeout, CBCentralAPIError):
-                    # retry
-                    if retry:
-                        self._outgoing_queue.appendleft(
-                            (data, sub_api, path, True)
-                        )
 
-                time.sleep(1)
-            time.sleep(1)
+            time.sleep(flush_interval)
+
+    def _take_batch(self, batch_size):
+        """Take next due request, merging consecutive batchable requests."""
+        ready = self._outbox.ready(batch_size)
+        if not ready:
+            return []
+
+        first = ready[0]
+        pending = [first]
+        if first.batch_path is None:
+            return pending
+
+        for candidate in ready[1:]:
+            if (
+                candidate.sub_api != first.sub_api
+                or candidate.batch_path != first.batch_path
+            ):
+                break
+            pending.append(candidate)
+
+        return pending
+
+    def _send_next(self, batch_size):
+        """Send next due request or batch of requests.
+
+        Failed requests back off their queue, and do not hold back other
+        queues. Only requests rejected by the server count towards giving
+        up on them. Returns whether sending should continue.
+        """
+        pending = self._take_batch(batch_size)
+        if not pending:
+            return False
+
+        first = pending[0]
+        data, sub_api, path = first.data, first.sub_api, first.path
+        if len(pending) > 1:
+            # merge payloads
+            data = {
+                "payload": json.dumps(
+                    {
+                        "events": [
+                            json.loads(request.data["payload"])
+                            for request in pending
+                        ]
+                    }
+                )
+            }
+            path = first.batch_path
+
+        try:
+            result = self._central_api_post(
+                data=data, sub_api=sub_api, path=path
+            )
+            if "status" not in result or result["status"] != "ok":
+                raise CBCentralAPIError()
+        except (CBCentralAPITimeout, CBCentralAPIUnreachable):
+            # server unreachable, wait for next round without giving up
+            self._outbox.defer(pending)
+            METRICS.increment("central.post_failures")
+            return False
+        except CBCentralAPIError:
+            self._outbox.fail(pending)
+            METRICS.increment("central.post_failures")
+            return True
+
+        self._outbox.ack(pending)
+        METRICS.increment("central.posts")
+        METRICS.observe("central.post_batch_size", len(pending))
+        return True
+
+    @classmethod
+    def get_session(cls, retry=True):
+        """Get pooled HTTP session of the calling thread.
+
+        Args
+        ----
+        retry: bool
+           Get a session that retries failed idempotent requests
+        """
+        name = "retry" if retry else "no_retry"
+        session = getattr(cls._sessions, name, None)
+        if session is None:
+            session = make_session(retry)
+            setattr(cls._sessions, name, session)
+        return session
 
     @staticmethod
     def get_central_address():
@@ -72,8 +182,15 @@ class ChainballCentralAPI(StoppableThread):
         )
 
     @classmethod
-    def central_api_get(cls, sub_api=None, path=None, timeout=10):
-        """Make a GET request."""
+    def central_api_get(
+        cls, sub_api=None, path=None, timeout=10, conditional=False
+    ):
+        """Make a GET request.
+
+        When conditional, the request carries the validators of the
+        previous response, and CBCentralAPINotModified is raised if the
+        server reports no change or returns an identical body.
+        """
         central_server_address, api_key = cls.get_central_address()
         if not central_server_address:
             raise CBCentralAPIError("server address empty")
@@ -87,29 +204,69 @@ class ChainballCentralAPI(StoppableThread):
         if path is not None:
             get_url = posixpath.join(get_url, path)
 
+        headers = {"Authorization": f"Api-Key {api_key}"}
+        validators = cls._get_validators.get(get_url)
+        if conditional and validators is not None:
+            etag, last_modified, _ = validators
+            if etag is not None:
+                headers["If-None-Match"] = etag
+            if last_modified is not None:
+                headers["If-Modified-Since"] = last_modified
+
         # perform request (blocking)
+        start = time.monotonic()
         try:
-            result = requests.get(
-                get_url,
-                timeout=timeout,
-                headers={"Authorization": f"Api-Key {api_key}"},
-                verify=False,
+            result = cls.get_session().get(
+                get_url, timeout=timeout, headers=headers, verify=False,
             )
         except Timeout:
             raise CBCentralAPITimeout("GET timed out.")
         except ConnectionError:
-            raise CBCentralAPIError("GET failed")
+            raise CBCentralAPIUnreachable("GET failed")
+        METRICS.observe("central.request_time", time.monotonic() - start)
+        if conditional and result.status_code == 304:
+            raise CBCentralAPINotModified("not modified")
         if result.status_code != 200:
             raise CBCentralAPIError(
                 "error querying central API: error {}".format(
                     result.status_code
                 )
             )
+
+        if conditional:
+            # servers without validator support are caught by the hash
+            content_hash = hashlib.md5(result.content).hexdigest()
+            cls._get_validators[get_url] = (
+                result.headers.get("ETag"),
+                result.headers.get("Last-Modified"),
+                content_hash,
+            )
+            if validators is not None and validators[2] == content_hash:
+                raise CBCentralAPINotModified("not modified")
+
         return result.json()
 
-    def push_post_request(self, data, sub_api=None, path=None, retry=True):
-        """Push post request into queue."""
-        self._outgoing_queue.append((data, sub_api, path, retry))
+    def push_post_request(
+        self,
+        data,
+        sub_api=None,
+        path=None,
+        retry=True,
+        batch_path=None,
+        queue=None,
+    ):
+        """Push post request into queue.
+
+        Consecutive requests with the same batch_path may be merged into a
+        single request to batch_path, with payload {"events": [...]}
+        holding each request's payload in order. Requests with the same
+        queue are delivered in order. Requests are kept on disk until
+        acknowledged by the server.
+        """
+        try:
+            self._outbox.push(data, sub_api, path, retry, batch_path, queue)
+        except OutboxError:
+            self.logger.error("cannot queue request to {}".format(path))
 
     def _central_api_post(self, data, sub_api=None, path=None, timeout=10):
         """Make a POST request."""
@@ -123,8 +280,9 @@ class ChainballCentralAPI(StoppableThread):
         if path is not None:
             get_url = posixpath.join(get_url, path)
 
+        start = time.monotonic()
         try:
-            result = requests.post(
+            result = self.get_session().post(
                 get_url,
                 timeout=timeout,
                 headers={"Authorization": f"Api-Key {api_key}"},
@@ -133,7 +291,8 @@ class ChainballCentralAPI(StoppableThread):
         except Timeout:
             raise CBCentralAPITimeout("POST timed out")
         except ConnectionError:
-            raise CBCentralAPIError("POST failed")
+            raise CBCentralAPIUnreachable("POST failed")
+        METRICS.observe("central.request_time", time.monotonic() - start)
 
         if result.status_code != 200:
             raise CBCentralAPIError(
@@ -148,7 +307,10 @@ class ChainballCentralAPI(StoppableThread):
         central_server_address, _ = cls.get_central_address()
 
         try:
-            requests.get(central_server_address, timeout=timeout, verify=False)
+            # a single attempt, so that the probe is bounded by timeout
+            cls.get_session(retry=False).get(
+                central_server_address, timeout=timeout, verify=False
+            )
         except (Timeout, ConnectionError):
             return False
 
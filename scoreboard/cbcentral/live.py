@@ -1,5 +1,23 @@
-"""Live updates."""
+"""Live updates.
 
+Game events are queued for upload as they happen, and consecutive events of
+a game are uploaded together. Endpoints on the central server, relative to
+the server address (all POST, form field "payload" holding a JSON object,
+response {"status": "ok"} on success):
+
+- api/games/<id>/start_game/: {"start_time", "player_order"}
+- api/games/<id>/push_event/: {"seq", "evt_type", "evt_data"}
+- api/games/<id>/push_events/: {"events": [<push_event payload>, ...]},
+  events in increasing "seq" order
+- api/games/<id>/stop_game/: {"reason", "winner", "running_time",
+  "remaining_time"}
+
+"seq" starts at 0 for every game and increases by one per event, so that
+the server can order events and detect missing ones. Requests of a game
+are delivered in the order they were made.
+"""
+
+import itertools
 import logging
 import json
 
@@ -7,23 +25,39 @@ from scoreboard.cbcentral.api import CENTRAL_API
 
 _LOGGER = logging.getLogger("sboard.live")
 
+# event sequence counters by game
+_EVENT_SEQUENCE = {}
+
 
 def push_event(game_uuid, evt_type, evt_desc):
     """Push event to server."""
-    post_data = {"evt_type": evt_type, "evt_data": evt_desc}
+    sequence = _EVENT_SEQUENCE.setdefault(game_uuid, itertools.count())
+    post_data = {
+        "seq": next(sequence),
+        "evt_type": evt_type,
+        "evt_data": evt_desc,
+    }
     data_dump = {"payload": json.dumps(post_data)}
     CENTRAL_API.push_post_request(
-        data_dump, sub_api="api", path=f"games/{game_uuid}/push_event/"
+        data_dump,
+        sub_api="api",
+        path=f"games/{game_uuid}/push_event/",
+        batch_path=f"games/{game_uuid}/push_events/",
+        queue=f"games/{game_uuid}",
     )
 
 
 def game_start(game_uuid, start_time, player_order):
     """Start game."""
+    _EVENT_SEQUENCE[game_uuid] = itertools.count()
     order = ",".join(player_order)
     post_data = {"start_time": start_time, "player_order": order}
     data_dump = {"payload": json.dumps(post_data)}
     CENTRAL_API.push_post_request(
-        data_dump, sub_api="api", path=f"games/{game_uuid}/start_game/"
+        data_dump,
+        sub_api="api",
+        path=f"games/{game_uuid}/start_game/",
+        queue=f"games/{game_uuid}",
     )
 
 
@@ -37,5 +71,9 @@ def game_end(game_uuid, reason, winner, running_time, remaining_time):
     }
     data_dump = {"payload": json.dumps(post_data)}
     CENTRAL_API.push_post_request(
-        data_dump, sub_api="api", path=f"games/{game_uuid}/stop_game/"
+        data_dump,
+        sub_api="api",
+        path=f"games/{game_uuid}/stop_game/",
+        queue=f"games/{game_uuid}",
     )
+    _EVENT_SEQUENCE.pop(game_uuid, None)
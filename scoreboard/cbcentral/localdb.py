@@ -1,5 +1,6 @@
 """Local, simplified cache for remote databases."""
 
+import hashlib
 import json
 import os
 from logging import getLogger
@@ -126,9 +127,12 @@ class LocalRegistry:
 
         # build
         self._registry_contents = []
+        self._registry_index = {}
+        self._registry_items = {}
         self._initializing = True
         self.build_registry(_registry_contents)
         self._initializing = False
+        _, self._committed_hash = self._dump_registry()
 
     @property
     def serialized(self):
@@ -148,50 +152,73 @@ class LocalRegistry:
     def build_registry(self, contents: List):
         """Build registry."""
         new_registry_contents = []
+        new_registry_index = {}
+        new_registry_items = {}
+        index_key = self._entry_class.get_index_name()
         for item in contents:
+            index_value = None
+            if index_key is not None:
+                index_value = item.get(index_key)
+            if (
+                index_value in self._registry_items
+                and self._registry_items[index_value] == item
+            ):
+                # unchanged upstream, reuse entry
+                new_content = self._registry_index[index_value]
+                new_registry_contents.append(new_content)
+                new_registry_index.setdefault(index_value, new_content)
+                new_registry_items.setdefault(index_value, item)
+                continue
+
             new_content = self._entry_class(**item)
             new_registry_contents.append(new_content)
-            try:
-                index_key = self._entry_class.get_index_name()
-                if index_key is not None:
-                    index_value = item[index_key]
-                    if not self._initializing and index_value not in self:
-                        # new content
-                        self.new_entry(new_content)
-                    current_content = self[index_value]
-                    if (
-                        not self._initializing
-                        and current_content != new_content
-                    ):
-                        modified_fields = current_content.compare_entries(
-                            new_content
-                        )
-                        for (
-                            field_name,
-                            (old_value, new_value),
-                        ) in modified_fields.items():
-                            self.value_changed(
-                                index_value, field_name, old_value, new_value
-                            )
-            except KeyError:
-                pass
-        # self._registry_contents = [
-        #     self._entry_class(**item) for item in contents
-        # ]
+            if index_key is None:
+                continue
+
+            index_value = new_content.index
+            new_registry_index.setdefault(index_value, new_content)
+            new_registry_items.setdefault(index_value, item)
+            if self._initializing:
+                continue
+
+            current_content = self._registry_index.get(index_value)
+            if current_content is None:
+                # new content
+                self.new_entry(new_content)
+                continue
+
+            if current_content != new_content:
+                modified_fields = current_content.compare_entries(new_content)
+                for (
+                    field_name,
+                    (old_value, new_value),
+                ) in modified_fields.items():
+                    self.value_changed(
+                        index_value, field_name, old_value, new_value
+                    )
+
         self._registry_contents = new_registry_contents
+        self._registry_index = new_registry_index
+        self._registry_items = new_registry_items
+
+    def _dump_registry(self):
+        """Serialize registry, get contents and hash."""
+        contents = json.dumps(self.serialized, indent=2)
+        return contents, hashlib.md5(contents.encode()).hexdigest()
 
     def commit_registry(self):
-        """Commit to disk."""
+        """Commit to disk, if contents have changed."""
+        contents, content_hash = self._dump_registry()
+        if content_hash == self._committed_hash:
+            return
+
         with open(self._registry_location, "w") as registry:
-            json.dump(self.serialized, registry, indent=2)
+            registry.write(contents)
+        self._committed_hash = content_hash
 
     def __getitem__(self, item):
-        if self._entry_class.get_index_name() is not None:
-            for element in self._registry_contents:
-                if element.index == item:
-                    return element
-
-        raise KeyError
+        """Get entry by index value."""
+        return self._registry_index[item]
 
     def __iter__(self):
         """Get iterator."""
@@ -199,11 +226,7 @@ class LocalRegistry:
 
     def __contains__(self, item):
         """Contains or not."""
-        try:
-            _ = self[item]
-            return True
-        except KeyError:
-            return False
+        return item in self._registry_index
 
     @property
     def data_layout(self):
@@ -514,7 +537,10 @@ class LocalAnnounceRegistry(LocalRegistry):
 
     def update_registry(self):
         """Update registry."""
-        upstream_announcements = query_announcements()
+        try:
+            upstream_announcements = query_announcements(conditional=True)
+        except api.CBCentralAPINotModified:
+            return
         self.build_registry(upstream_announcements)
         self.commit_registry()
 
@@ -536,7 +562,10 @@ class LocalGameRegistry(LocalRegistry):
 
     def update_registry(self):
         """Update registry."""
-        upstream_games = query_games()
+        try:
+            upstream_games = query_games(conditional=True)
+        except api.CBCentralAPINotModified:
+            return
         self.build_registry(upstream_games)
 
     def value_changed(self, entry_index, field_name, old_value, new_value):
@@ -0,0 +1,321 @@
+"""Durable outbox for requests to the central server."""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# retry backoff, in seconds
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 300.0
+# move a request to the dead letter table after the server rejected it
+# this many times
+_MAX_ATTEMPTS = 20
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data TEXT NOT NULL,
+        sub_api TEXT,
+        path TEXT,
+        retry INTEGER NOT NULL,
+        batch_path TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        queue TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS backoff (
+        queue TEXT PRIMARY KEY,
+        next_attempt REAL NOT NULL,
+        failures INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dead_letter (
+        id INTEGER PRIMARY KEY,
+        data TEXT NOT NULL,
+        sub_api TEXT,
+        path TEXT,
+        queue TEXT,
+        attempts INTEGER NOT NULL,
+        failed_at REAL NOT NULL
+    )
+    """,
+)
+
+
+class OutboxError(Exception):
+    """Outbox access error."""
+
+
+class OutboxItem:
+    """Queued request."""
+
+    def __init__(
+        self, item_id, data, sub_api, path, retry, batch_path, queue=None
+    ):
+        """Initialize."""
+        self.item_id = item_id
+        self.data = data
+        self.sub_api = sub_api
+        self.path = path
+        self.retry = retry
+        self.batch_path = batch_path
+        self.queue = queue
+
+
+class PostOutbox:
+    """Outbox of POST requests, backed by SQLite.
+
+    Requests survive restarts and are removed once acknowledged. Requests
+    pushed to the same queue are delivered in order: when one fails, its
+    whole queue is backed off exponentially, while other queues keep
+    going. Requests that the server keeps rejecting are moved to a dead
+    letter table; requests that could not reach the server are kept for
+    as long as it takes.
+    """
+
+    def __init__(self, path):
+        """Initialize.
+
+        Args
+        ----
+        path: str
+           Database file path, ":memory:" for a volatile outbox
+        """
+        self.logger = logging.getLogger("sboard.outbox")
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        """Get database connection, opening it if needed."""
+        if self._db is None:
+            try:
+                folder = os.path.dirname(self.path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                self._db = sqlite3.connect(
+                    self.path, check_same_thread=False, isolation_level=None
+                )
+                for statement in _SCHEMA:
+                    self._db.execute(statement)
+                self._compact(self._db)
+            except (OSError, sqlite3.Error):
+                self._db = None
+                raise OutboxError("cannot open outbox {}".format(self.path))
+
+        return self._db
+
+    @staticmethod
+    def _compact(db):
+        """Reclaim space left by delivered requests, once per start."""
+        free_pages = db.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages > 0:
+            db.execute("VACUUM")
+
+    @staticmethod
+    def _back_off(db, queue, now):
+        """Delay a queue, doubling the delay on consecutive failures."""
+        row = db.execute(
+            "SELECT failures FROM backoff WHERE queue = ?", (queue,)
+        ).fetchone()
+        failures = 1 if row is None else row[0] + 1
+        delay = min(_BACKOFF_BASE * 2 ** (failures - 1), _BACKOFF_MAX)
+        db.execute(
+            "INSERT OR REPLACE INTO backoff (queue, next_attempt, failures) "
+            "VALUES (?, ?, ?)",
+            (queue, now + delay, failures),
+        )
+
+    def push(
+        self,
+        data,
+        sub_api=None,
+        path=None,
+        retry=True,
+        batch_path=None,
+        queue=None,
+    ):
+        """Queue a request.
+
+        Args
+        ----
+        queue: str
+           Requests of a queue are delivered in order, None for a request
+           that does not depend on others
+        """
+        if queue is None:
+            queue = uuid.uuid4().hex
+        with self._lock:
+            try:
+                self._connection().execute(
+                    "INSERT INTO outbox (data, sub_api, path, retry, "
+                    "batch_path, queue) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        json.dumps(data),
+                        sub_api,
+                        path,
+                        int(retry),
+                        batch_path,
+                        queue,
+                    ),
+                )
+            except sqlite3.Error:
+                raise OutboxError("cannot queue request")
+
+    def ready(self, limit):
+        """Get requests of queues that are not backed off, oldest first.
+
+        Args
+        ----
+        limit: int
+           Maximum number of requests
+        """
+        with self._lock:
+            try:
+                rows = self._connection().execute(
+                    "SELECT id, data, sub_api, path, retry, batch_path, "
+                    "outbox.queue FROM outbox LEFT JOIN backoff "
+                    "ON outbox.queue = backoff.queue "
+                    "WHERE backoff.next_attempt IS NULL "
+                    "OR backoff.next_attempt <= ? ORDER BY id LIMIT ?",
+                    (time.time(), limit),
+                )
+                return [
+                    OutboxItem(
+                        row[0],
+                        json.loads(row[1]),
+                        row[2],
+                        row[3],
+                        bool(row[4]),
+                        row[5],
+                        row[6],
+                    )
+                    for row in rows
+                ]
+            except sqlite3.Error:
+                raise OutboxError("cannot read outbox")
+
+    def ack(self, items):
+        """Remove delivered requests."""
+        with self._lock:
+            try:
+                db = self._connection()
+                db.executemany(
+                    "DELETE FROM outbox WHERE id = ?",
+                    [(item.item_id,) for item in items],
+                )
+                db.executemany(
+                    "DELETE FROM backoff WHERE queue = ?",
+                    [(queue,) for queue in {item.queue for item in items}],
+                )
+            except sqlite3.Error:
+                raise OutboxError("cannot acknowledge requests")
+
+    def fail(self, items):
+        """Back off the queues of requests that the server rejected.
+
+        Requests that do not retry are dropped, and requests that were
+        rejected too many times are moved to the dead letter table so that
+        the rest of their queue can go on.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._connection()
+                resumed = set()
+                delayed = set()
+                for item in items:
+                    if not item.retry:
+                        self.logger.warning(
+                            "dropping request to {}".format(item.path)
+                        )
+                        db.execute(
+                            "DELETE FROM outbox WHERE id = ?", (item.item_id,)
+                        )
+                        continue
+
+                    row = db.execute(
+                        "SELECT attempts FROM outbox WHERE id = ?",
+                        (item.item_id,),
+                    ).fetchone()
+                    if row is None:
+                        continue
+
+                    attempts = row[0] + 1
+                    if attempts >= _MAX_ATTEMPTS:
+                        self.logger.error(
+                            "request to {} failed {} times, moving it to "
+                            "the dead letter table".format(item.path, attempts)
+                        )
+                        db.execute(
+                            "INSERT INTO dead_letter (id, data, sub_api, "
+                            "path, queue, attempts, failed_at) "
+                            "SELECT id, data, sub_api, path, queue, ?, ? "
+                            "FROM outbox WHERE id = ?",
+                            (attempts, now, item.item_id),
+                        )
+                        db.execute(
+                            "DELETE FROM outbox WHERE id = ?", (item.item_id,)
+                        )
+                        resumed.add(item.queue)
+                        continue
+
+                    db.execute(
+                        "UPDATE outbox SET attempts = ? WHERE id = ?",
+                        (attempts, item.item_id),
+                    )
+                    delayed.add(item.queue)
+
+                for queue in delayed:
+                    self._back_off(db, queue, now)
+                for queue in resumed - delayed:
+                    # head of the queue is gone, resume right away
+                    db.execute("DELETE FROM backoff WHERE queue = ?", (queue,))
+            except sqlite3.Error:
+                raise OutboxError("cannot reschedule requests")
+
+    def defer(self, items):
+        """Back off the queues of requests that did not reach the server.
+
+        Unlike fail, no attempt is counted, so requests are never given up
+        on while the server is unreachable.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                db = self._connection()
+                for queue in {item.queue for item in items}:
+                    self._back_off(db, queue, now)
+            except sqlite3.Error:
+                raise OutboxError("cannot reschedule requests")
+
+    def dead_letters(self):
+        """Get amount of requests that were given up on."""
+        with self._lock:
+            try:
+                return (
+                    self._connection()
+                    .execute("SELECT COUNT(*) FROM dead_letter")
+                    .fetchone()[0]
+                )
+            except sqlite3.Error:
+                raise OutboxError("cannot read outbox")
+
+    def __len__(self):
+        """Get amount of queued requests."""
+        with self._lock:
+            try:
+                return (
+                    self._connection()
+                    .execute("SELECT COUNT(*) FROM outbox")
+                    .fetchone()[0]
+                )
+            except sqlite3.Error:
+                raise OutboxError("cannot read outbox")
@@ -17,15 +17,17 @@ def query_tournaments():
     )
 
 
-def query_games():
+def query_games(conditional=False):
     """Query games."""
-    return api.ChainballCentralAPI.central_api_get(sub_api="api", path="games")
+    return api.ChainballCentralAPI.central_api_get(
+        sub_api="api", path="games", conditional=conditional
+    )
 
 
-def query_announcements():
+def query_announcements(conditional=False):
     """Query announcements."""
     return api.ChainballCentralAPI.central_api_get(
-        sub_api="api", path="announce"
+        sub_api="api", path="announce", conditional=conditional
     )
 
 
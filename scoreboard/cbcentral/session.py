@@ -0,0 +1,94 @@
+"""Pooled HTTP sessions for central server access."""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from scoreboard.util.metrics import METRICS
+
+# connections kept alive per host
+_POOL_CONNECTIONS = 2
+_POOL_MAXSIZE = 4
+
+# retries; only idempotent requests are retried after being sent
+_RETRY_TOTAL = 3
+_RETRY_BACKOFF = 0.5
+_RETRY_STATUS = (502, 503, 504)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    """HTTP connection that records connection setup time."""
+
+    def connect(self):
+        """Connect."""
+        start = time.monotonic()
+        super().connect()
+        METRICS.observe("central.connect_time", time.monotonic() - start)
+        METRICS.increment("central.connections")
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that records connection setup (TCP + TLS) time."""
+
+    def connect(self):
+        """Connect."""
+        start = time.monotonic()
+        super().connect()
+        METRICS.observe("central.connect_time", time.monotonic() - start)
+        METRICS.increment("central.connections")
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Adapter with keep-alive pools that record connection setup time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Initialize pool manager."""
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def make_session(retry=True):
+    """Create a session with keep-alive, pooling and retry policy.
+
+    Sessions are not thread safe, each thread should use its own.
+
+    Args
+    ----
+    retry: bool
+       Retry failed idempotent requests, disable for quick probes
+    """
+    if retry:
+        policy = Retry(
+            total=_RETRY_TOTAL,
+            backoff_factor=_RETRY_BACKOFF,
+            status_forcelist=_RETRY_STATUS,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+    else:
+        policy = Retry(total=0, raise_on_status=False)
+    adapter = TimedHTTPAdapter(
+        pool_connections=_POOL_CONNECTIONS,
+        pool_maxsize=_POOL_MAXSIZE,
+        max_retries=policy,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
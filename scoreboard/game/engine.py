@@ -2,7 +2,9 @@
 
 import logging
 import os
+import time
 
+from scoreboard.announce.clock import GameClock
 from scoreboard.announce.timer import TimerAnnouncement, TimerHandler
 from scoreboard.game.config import ChainballGameConfiguration
 from scoreboard.game.constants import GameTurnActions, MasterRemoteActions
@@ -37,6 +39,7 @@ from scoreboard.remote.constants import RemoteCommands, RemotePairFailureType
 from scoreboard.remote.decoder import RemoteDecoder
 from scoreboard.remote.nrf24 import NRF24Handler
 from scoreboard.remote.pair import RemotePairHandler
+from scoreboard.remote.persistence import PERSISTENT_REMOTE_DATA
 from scoreboard.score.handler import ScoreHandler
 from scoreboard.score.player import PlayerScore
 from scoreboard.util.soundfx import SFX_HANDLER
@@ -44,6 +47,14 @@ from scoreboard.util.configfiles import (
     CHAINBALL_CONFIGURATION,
     ChainBallConfigurationError,
 )
+from scoreboard.util.metrics import METRICS
+
+
+# remote route of the master remote, other routes are player numbers
+MASTER_REMOTE_ROUTE = "master"
+
+# court announcement SFX are named court<number>
+COURT_SFX_PREFIX = "court"
 
 
 class MasterRemote:
@@ -64,6 +75,8 @@ class ChainballGame:
 
         self.rf_handler = None
         self.remote_mapping = None
+        # remote id -> player number or MASTER_REMOTE_ROUTE
+        self._remote_routes = {}
         self.pair_handler = None
         self.m_remote = None
         self.s_handler = ScoreHandler("/dev/ttyAMA0", virt_hw=virtual_hw)
@@ -80,6 +93,15 @@ class ChainballGame:
             self.sfx_mapping.parse_config(sfx_mapping_config)
         except SFXMappingLoadFailed:
             self.logger.error("Failed to load SFX mapping")
+        # decode game event and court announcement SFX ahead of time
+        SFX_HANDLER.preload(
+            *self.sfx_mapping.mapping.values(),
+            *(
+                name
+                for name in SFX_HANDLER.fx_dict
+                if name.startswith(COURT_SFX_PREFIX)
+            ),
+        )
 
         # load other game configuration
         self.game_config = ChainballGameConfiguration()
@@ -90,10 +112,12 @@ class ChainballGame:
             self.logger.error("Failed to load game configuration")
             exit(1)
 
+        # game clock, shared by the timer displays
+        self.game_clock = GameClock(self.game_timeout)
         # timer handler for RGB matrix
-        self.timer_handler = TimerHandler(self.game_timeout, self)
+        self.timer_handler = TimerHandler(self.game_clock, self)
         # timer handler for player panels
-        self.ptimer_handler = TimerHandler(self.game_timeout, self, False)
+        self.ptimer_handler = TimerHandler(self.game_clock, self, False)
 
         # create player dictionary
         self.players = {
@@ -112,7 +136,12 @@ class ChainballGame:
         persist_location = os.path.join(
             db_configuration["database_location"], "persist", "games"
         )
-        self.g_persist = GamePersistance(persist_location)
+        self.g_persist = GamePersistance(
+            persist_location,
+            journal=db_configuration["persist_journal"],
+            fsync_batch=db_configuration["persist_fsync_batch"],
+            cache_size=db_configuration["persist_history_cache"],
+        )
 
         # set flags
         self.ongoing = False
@@ -132,11 +161,20 @@ class ChainballGame:
         # start score handler
         self.s_handler.start()
 
+        # start music player control
+        SFX_HANDLER.start()
+
         # other variables
         self._current_fault_count = 0
 
     def _initialize_remote_subsystem(self, test_hw=False):
-        self.rf_handler = NRF24Handler(fake_hw=test_hw)
+        scoreboard_config = CHAINBALL_CONFIGURATION.scoreboard
+        self.rf_handler = NRF24Handler(
+            fake_hw=test_hw,
+            irq_pin=scoreboard_config.get("rf_irq_pin"),
+            poll_interval=scoreboard_config.get("rf_poll_interval", 0.1),
+            spi_pacing=scoreboard_config.get("rf_spi_pacing"),
+        )
         # load remote mapping configuration file
         self.remote_mapping = RemoteMapping("rm_map")
         try:
@@ -147,15 +185,22 @@ class ChainballGame:
         except (RemoteMappingLoadFailed, ChainBallConfigurationError):
             self.logger.error("Failed to load remote button mapping")
             exit(1)
-        # remote pair handler (non-threaded)
+        # remote pair handler (non-threaded), tracks pairings in the routes
         self.pair_handler = RemotePairHandler(
-            fail_cb=self.pair_fail, success_cb=self.pair_end
+            fail_cb=self.pair_fail,
+            success_cb=self.pair_end,
+            pair_track=self._remote_routes,
         )
 
     def _start_remote_subsystem(self):
         if self.rf_handler is not None:
             # start rf handler
             self.rf_handler.start()
+            PERSISTENT_REMOTE_DATA.start(
+                CHAINBALL_CONFIGURATION.scoreboard.get(
+                    "remote_flush_interval", 10.0
+                )
+            )
 
             # master remote
             self.m_remote = MasterRemote()
@@ -239,8 +284,10 @@ class ChainballGame:
         # stop
         self.rf_handler.stop()
         self.rf_handler.join()
+        PERSISTENT_REMOTE_DATA.stop()
 
         # delete
+        self._remote_routes.pop(self.m_remote.remote_id, None)
         self.rf_handler = None
         self.pair_handler = None
         self.m_remote = None
@@ -277,7 +324,7 @@ class ChainballGame:
             )
         )
 
-        self.pair_handler.stop_tracking(self.players[player].remote_id)
+        self._remote_routes.pop(self.players[player].remote_id, None)
         self.players[player].remote_id = None
 
     def pair_master(self):
@@ -289,13 +336,15 @@ class ChainballGame:
                 "Already paired to {}".format(self.m_remote.remote_id)
             )
         # pair
-        self.pair_handler.start_pair("master", self.game_config.pair_timeout)
+        self.pair_handler.start_pair(
+            MASTER_REMOTE_ROUTE, self.game_config.pair_timeout
+        )
 
     def unpair_master(self):
         """Unpair master remote."""
         if self._remotes is False:
             raise ChainballGameError("remotes are disaled.")
-        self.pair_handler.stop_tracking(self.m_remote.remote_id)
+        self._remote_routes.pop(self.m_remote.remote_id, None)
         self.m_remote.remote_id = None
 
     def pair_remote(self, player):
@@ -320,7 +369,8 @@ class ChainballGame:
         """Finish pairing remote."""
         if self._remotes is False:
             raise ChainballGameError("remotes are disabled.")
-        if player == "master":
+        self._remote_routes[remote_id] = player
+        if player == MASTER_REMOTE_ROUTE:
             self.m_remote.remote_id = remote_id
             self.logger.info(
                 "Paired remote {} as the master remote".format(remote_id)
@@ -371,6 +421,9 @@ class ChainballGame:
         if self._remotes:
             self.rf_handler.stop()
             self.rf_handler.join()
+            PERSISTENT_REMOTE_DATA.stop()
+        SFX_HANDLER.stop()
+        self.g_persist.close()
         self.logger.debug("game engine shutdown complete")
 
     def game_can_start(self):
@@ -480,6 +533,8 @@ class ChainballGame:
                         p_data.web_text = self.players[p_num].web_text
                         p_data.panel_text = self.players[p_num].panel_text
                         p_data.remote_id = self.players[p_num].remote_id
+                        if p_data.remote_id is not None:
+                            self._remote_routes[p_data.remote_id] = p_id
                         p_data.registry_username = self.players[
                             p_num
                         ].registry_username
@@ -518,8 +573,7 @@ class ChainballGame:
             self.players[player].panel_text = None
             self.players[player].registered = False
             self.players[player].registry_username = None
-            if self.pair_handler is not None:
-                self.pair_handler.stop_tracking(self.players[player].remote_id)
+            self._remote_routes.pop(self.players[player].remote_id, None)
             self.players[player].remote_id = None
             self.player_count -= 1
 
@@ -575,8 +629,7 @@ class ChainballGame:
         self.finished = False
         self.game_set_active_player(0)
 
-        self.timer_handler.start(self.game_config.game_duration)
-        self.ptimer_handler.start(self.game_config.game_duration)
+        self.game_clock.start(self.game_config.game_duration)
 
         # confirm start
         self.g_persist.start_game(self.get_remaining_time())
@@ -593,23 +646,21 @@ class ChainballGame:
             self.g_persist.assign_user_id(game_uid)
 
     def get_remaining_time(self):
-        """Get remaining time in seconds."""
+        """Get remaining time in seconds, with millisecond resolution."""
         if self.ongoing is False:
             return None
 
-        minutes, seconds = self.timer_handler.get_remaining_time()
-
-        return minutes * 60 + seconds
+        return self.game_clock.get_remaining_seconds()
 
     def get_running_time(self):
-        """Get running time in seconds."""
+        """Get running time in seconds, with millisecond resolution."""
         if self.ongoing is False:
             return None
 
         # duration in seconds
         duration = self.game_config.game_duration * 60
 
-        return duration - self.get_remaining_time()
+        return round(duration - self.get_remaining_time(), 3)
 
     def find_high_score(self):
         """Find high score between players."""
@@ -639,8 +690,7 @@ class ChainballGame:
 
         self.logger.info("Game PAUSED")
         self.paused = True
-        self.timer_handler.pause()
-        self.ptimer_handler.pause()
+        self.game_clock.pause()
 
     def game_unpause(self):
         """Unpause game."""
@@ -662,8 +712,7 @@ class ChainballGame:
 
         self.logger.info("Game UNPAUSED")
         self.paused = False
-        self.timer_handler.unpause()
-        self.ptimer_handler.unpause()
+        self.game_clock.unpause()
 
     def game_end(self, reason=None, winner=None):
         """Stop game."""
@@ -694,8 +743,7 @@ class ChainballGame:
         except SFXUnknownEvent:
             pass
 
-        self.timer_handler.stop()
-        self.ptimer_handler.stop()
+        self.game_clock.stop()
 
         self.g_persist.end_game(
             reason, winner, self.get_running_time(), self.get_remaining_time()
@@ -898,12 +946,17 @@ class ChainballGame:
         if self.pair_handler.remote_event(message):
             return
 
+        route = self._remote_routes.get(message.remote_id)
+        if route is None:
+            # not paired
+            return
+
         # master
-        if message.remote_id == self.m_remote.remote_id:
+        if route == MASTER_REMOTE_ROUTE:
             # master remote actions
             if message.command == RemoteCommands.BTN_PRESS:
                 if (
-                    self.remote_mapping.master_mapping[message.cmd_data]
+                    self.remote_mapping.master_mapping.get(message.cmd_data)
                     == MasterRemoteActions.PAUSE_UNPAUSE_CLOCK
                 ):
                     if not self.ongoing:
@@ -923,10 +976,11 @@ class ChainballGame:
         if self.paused:
             return
 
-        commanding_player = self.find_player_by_remote(message.remote_id)
+        commanding_player = route
 
-        mapping = self.remote_mapping.player_mapping[message.cmd_data]
         if message.command == RemoteCommands.BTN_PRESS:
+            # battery reports also come from player remotes
+            mapping = self.remote_mapping.player_mapping.get(message.cmd_data)
             if mapping == GameTurnActions.DECREASE_SCORE:
                 self.game_decrement_score(commanding_player)
             elif mapping == GameTurnActions.INCREASE_SCORE:
@@ -944,9 +998,10 @@ class ChainballGame:
 
     def find_player_by_remote(self, remote_id):
         """Find player by remote id."""
-        for player in self.players:
-            if self.players[player].remote_id == remote_id:
-                return player
+        route = self._remote_routes.get(remote_id)
+        if route == MASTER_REMOTE_ROUTE:
+            return None
+        return route
 
     def count_players_out(self):
         """Get how many players are out of the game."""
@@ -1058,6 +1113,35 @@ class ChainballGame:
             )
             self.game_decrement_score(int(player), referee_event=True)
 
+    def _check_game_end(self):
+        """Check for cowouts and a winner, return whether the game ended."""
+        if not self.ongoing:
+            return False
+
+        # check for a cowout
+        for player in self.players:
+            if (
+                self.players[player].current_score == -10
+                and self.players[player].is_cowout is False
+            ):
+                self.players[player].is_cowout = True
+                self.game_player_out(player)
+
+        # check for a winner
+        if self.count_players_out() >= self.player_count - 1:
+            self.logger.info("Only one player remais! Ending")
+            self.game_timeout()
+            return True
+
+        for player in self.players:
+            if self.players[player].current_score == 5:
+                self.logger.info("Player {} has won the game".format(player))
+                self.announce_end(player)
+                self.game_end(reason="PLAYER_WON", winner=player)
+                return True
+
+        return False
+
     def game_loop(self):
         """Handle main game loop."""
         # handle serves
@@ -1072,50 +1156,33 @@ class ChainballGame:
         if self.pair_handler is not None:
             self.pair_handler.handle()
 
-        # handle timer
-        self.timer_handler.handle()
-
-        # handle player panel timer
-        self.ptimer_handler.handle()
-
-        # check for a cowout
-        if self.ongoing:
-            for player in self.players:
-                if (
-                    self.players[player].current_score == -10
-                    and self.players[player].is_cowout is False
-                ):
-                    self.players[player].is_cowout = True
-                    self.game_player_out(player)
-
-        # check for a winner
-        if self.ongoing:
-            if self.count_players_out() >= self.player_count - 1:
-                self.logger.info("Only one player remais! Ending")
-                self.game_timeout()
-                return
+        # handle game clock and timer displays
+        self.game_clock.handle()
 
-            for player in self.players:
-                if self.players[player].current_score == 5:
-                    self.logger.info(
-                        "Player {} has won the game".format(player)
-                    )
-                    self.announce_end(player)
-                    self.game_end(reason="PLAYER_WON", winner=player)
-                    return
+        if self._check_game_end():
+            return
 
-        # check for remote activity
+        # check for remote activity, handling bursts in arrival order
         if self.rf_handler is not None and self.rf_handler.message_pending():
-            message = self.rf_handler.receive_message()
-            # process message
-            try:
-                decoded = RemoteDecoder(message.payload)
-            except IOError:
-                # invalid, ignore
-                return
+            messages = self.rf_handler.receive_all()
+            METRICS.observe("remote.queue_depth", len(messages))
+            for message in messages:
+                # process message
+                try:
+                    decoded = RemoteDecoder(message.payload)
+                except IOError:
+                    # invalid, ignore
+                    continue
+
+                self.logger.debug("Received: {}".format(decoded))
+                self._game_decode_remote(decoded)
+                METRICS.observe(
+                    "remote.latency", time.monotonic() - message.received
+                )
 
-            self.logger.debug("Received: {}".format(decoded))
-            self._game_decode_remote(decoded)
+                # a press may end the game, later ones in the burst must
+                # not score anymore but are still handled
+                self._check_game_end()
 
         # make score announcements
         if self.score_display_ended and self.ongoing:
@@ -1144,9 +1211,6 @@ class ChainballGame:
         self.logger.info(
             "Queuing announcement for next game in court {}".format(court)
         )
-        announcement = [f"court{court}"]
+        announcement = [f"{COURT_SFX_PREFIX}{court}"]
         announcement.extend(players)
-        try:
-            SFX_HANDLER.play_fx(*announcement)
-        except KeyError:
-            pass
+        SFX_HANDLER.play_playlist(*announcement)
@@ -0,0 +1,223 @@
+"""Indexed, lazily loaded game history."""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+
+from scoreboard.util.files import write_json
+
+# files in the persistance folder which are not game records
+_RESERVED_NAMES = ("game", "index")
+
+
+class GameHistory:
+    """Game history backed by an on-disk index.
+
+    Only a compact summary of every game is kept in memory. Full game
+    records are loaded on access and kept in a LRU cache; records for live
+    games are pinned in memory until they are released.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path, cache_size=16):
+        """Initialize.
+
+        Args
+        ----
+        path: str
+           Path where game persistance files are stored
+        cache_size: int
+           How many finished games are kept in memory
+        """
+        self.logger = logging.getLogger("sboard.ghistory")
+        self.path = path
+        self._cache_size = cache_size
+        self._index = {}
+        self._cache = OrderedDict()
+        self._live = {}
+
+    @property
+    def index(self):
+        """Get game summaries indexed by game identifier."""
+        return self._index
+
+    def _game_path(self, game_uuid):
+        """Get game file path."""
+        return os.path.join(self.path, game_uuid + ".json")
+
+    @staticmethod
+    def summarize(game_data):
+        """Build index entry from a serialized game.
+
+        Args
+        ----
+        game_data: dict
+           Serialized game
+        """
+        winner = None
+        for event in reversed(game_data.get("events", [])):
+            if event.get("evt_type") == "GAME_END":
+                evt_desc = event.get("evt_desc") or {}
+                winner = evt_desc.get("winner")
+                break
+
+        players = {
+            player_num: {
+                "display_name": player.get("display_name"),
+                "username": player.get("username"),
+            }
+            for player_num, player in game_data.get("player_data", {}).items()
+        }
+
+        return {
+            "start_time": game_data.get("start_time"),
+            "game_state": game_data.get("game_state"),
+            "players": players,
+            "winner": winner,
+        }
+
+    def load(self):
+        """Load index, bringing it up to date with the persistance folder."""
+        try:
+            with open(os.path.join(self.path, self.INDEX_FILE), "r") as data:
+                self._index = json.load(data)
+        except (OSError, json.JSONDecodeError):
+            self.logger.warning("Could not load game index, rebuilding")
+            self._index = {}
+
+        try:
+            file_names = os.listdir(self.path)
+        except OSError:
+            self.logger.error("Could not load individual game persistances")
+            return
+
+        changed = False
+        present = set()
+        for fname in file_names:
+            file_uuid, ext = os.path.splitext(fname)
+            if ext != ".json" or file_uuid in _RESERVED_NAMES:
+                continue
+            present.add(file_uuid)
+
+            try:
+                stat = os.stat(self._game_path(file_uuid))
+            except OSError:
+                continue
+
+            entry = self._index.get(file_uuid)
+            if (
+                entry is not None
+                and entry.get("size") == stat.st_size
+                and entry.get("mtime") == stat.st_mtime
+            ):
+                continue
+
+            if self.update_entry(file_uuid, save=False):
+                changed = True
+
+        # drop games that no longer exist
+        for file_uuid in list(self._index):
+            if file_uuid not in present:
+                del self._index[file_uuid]
+                changed = True
+
+        if changed:
+            self.save_index()
+
+    def update_entry(self, game_uuid, save=True):
+        """Refresh index entry for a game from its file.
+
+        Args
+        ----
+        game_uuid: str
+           Game identifier
+        save: bool
+           Whether to write the index to disk
+        """
+        file_name = self._game_path(game_uuid)
+        try:
+            with open(file_name, "r") as game:
+                game_data = json.load(game)
+            stat = os.stat(file_name)
+        except (OSError, json.JSONDecodeError):
+            self.logger.warning(
+                "Could not load game persistance for game {}".format(game_uuid)
+            )
+            return False
+
+        entry = self.summarize(game_data)
+        entry["size"] = stat.st_size
+        entry["mtime"] = stat.st_mtime
+        self._index[game_uuid] = entry
+
+        if save:
+            self.save_index()
+
+        return True
+
+    def save_index(self):
+        """Write index to disk."""
+        try:
+            write_json(os.path.join(self.path, self.INDEX_FILE), self._index)
+        except OSError:
+            self.logger.error("Could not save game index")
+
+    def release(self, game_uuid):
+        """Stop pinning a live game, its file becomes authoritative.
+
+        Args
+        ----
+        game_uuid: str
+           Game identifier
+        """
+        self._live.pop(game_uuid, None)
+        self.update_entry(game_uuid)
+
+    def __setitem__(self, game_uuid, game_data):
+        """Pin a live game record."""
+        self._cache.pop(game_uuid, None)
+        self._live[game_uuid] = game_data
+
+    def __getitem__(self, game_uuid):
+        """Get game record, loading it if needed."""
+        if game_uuid in self._live:
+            return self._live[game_uuid]
+
+        if game_uuid in self._cache:
+            self._cache.move_to_end(game_uuid)
+            return self._cache[game_uuid]
+
+        if game_uuid not in self._index:
+            raise KeyError(game_uuid)
+
+        try:
+            with open(self._game_path(game_uuid), "r") as game:
+                game_data = json.load(game)
+        except (OSError, json.JSONDecodeError):
+            self.logger.warning(
+                "Could not load game persistance for game {}".format(game_uuid)
+            )
+            raise KeyError(game_uuid)
+
+        if self._cache_size > 0:
+            self._cache[game_uuid] = game_data
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+        return game_data
+
+    def __contains__(self, game_uuid):
+        """Get whether a game exists."""
+        return game_uuid in self._live or game_uuid in self._index
+
+    def __iter__(self):
+        """Iterate over game identifiers."""
+        return iter(
+            sorted(set(self._index).union(self._live), key=lambda x: str(x))
+        )
+
+    def __len__(self):
+        """Get amount of games."""
+        return len(set(self._index).union(self._live))
@@ -0,0 +1,118 @@
+"""Append-only game event journal."""
+
+import json
+import logging
+import os
+
+
+class GameJournalError(Exception):
+    """Journal access error."""
+
+
+class GameJournalRecords:
+    """Journal record kinds."""
+
+    EVENT = "event"
+    SCORE = "score"
+    USER_ID = "user_id"
+
+
+class GameJournal:
+    """Append-only journal of changes made to a game record.
+
+    Each change is written as one JSON object per line (JSON Lines), so the
+    cost of recording a change does not depend on how long the game is.
+    """
+
+    def __init__(self, path, fsync_batch=1):
+        """Initialize.
+
+        Args
+        ----
+        path: str
+           Journal file path
+        fsync_batch: int
+           Force data to disk every N records, 0 never forces
+        """
+        self.logger = logging.getLogger("sboard.journal")
+        self.path = path
+        self._fsync_batch = fsync_batch
+        self._pending = 0
+        try:
+            self._file = open(path, "a")
+        except OSError:
+            raise GameJournalError("cannot open journal {}".format(path))
+
+    def append(self, record):
+        """Append a record.
+
+        Args
+        ----
+        record: dict
+           Record to append
+        """
+        if self._file is None:
+            raise GameJournalError("journal is closed")
+
+        try:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._pending += 1
+            if self._fsync_batch > 0 and self._pending >= self._fsync_batch:
+                self.sync()
+        except OSError:
+            raise GameJournalError("cannot write to journal")
+
+    def sync(self):
+        """Force pending records to disk."""
+        if self._file is None or self._pending == 0:
+            return
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self, remove=False):
+        """Close journal.
+
+        Args
+        ----
+        remove: bool
+           Delete journal file after closing
+        """
+        if self._file is not None:
+            try:
+                self.sync()
+            except OSError:
+                self.logger.error("could not sync journal")
+            self._file.close()
+            self._file = None
+
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError:
+                self.logger.error("could not remove journal")
+
+    @staticmethod
+    def read(path):
+        """Read all records from a journal.
+
+        A partially written record at the end of the file (e.g. after a
+        power cut) is discarded.
+
+        Args
+        ----
+        path: str
+           Journal file path
+        """
+        records = []
+        try:
+            with open(path, "r") as journal:
+                for line in journal:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+        except OSError:
+            raise GameJournalError("cannot read journal {}".format(path))
+
+        return records
@@ -6,7 +6,14 @@ import logging
 import os
 import scoreboard.cbcentral.live as live_game
 from scoreboard.cbcentral.localdb import PLAYER_REGISTRY
+from scoreboard.game.history import GameHistory
+from scoreboard.game.journal import (
+    GameJournal,
+    GameJournalError,
+    GameJournalRecords,
+)
 from scoreboard.util.configfiles import CHAINBALL_CONFIGURATION
+from scoreboard.util.files import write_json
 from scoreboard.ipc.server import IPC_HANDLER
 
 
@@ -114,8 +121,8 @@ class GamePersistData:
         ----
         players: dict
            Dictionary of player data indexed by player number
-        handler: unknown
-           Not sure
+        handler: callable
+           Called with a record describing each change to the game
         current_series: int
            Current game identifier (persistent value always increasing)
         """
@@ -144,7 +151,9 @@ class GamePersistData:
         self.user_game_id = user_id
 
         if self.data_change_handler is not None:
-            self.data_change_handler()
+            self.data_change_handler(
+                {"kind": GameJournalRecords.USER_ID, "user_id": user_id}
+            )
 
     def update_score(self, player, score, forced_update=False, game_time=None):
         """Update player score record.
@@ -157,7 +166,7 @@ class GamePersistData:
             New score
         forced_update: bool
             Is this a forced update or a normal update; i.e. from scoring evt
-        game_time: int
+        game_time: float
             Current game time in seconds
         """
         if player not in self.player_data:
@@ -181,7 +190,13 @@ class GamePersistData:
             )
         else:
             if self.data_change_handler is not None:
-                self.data_change_handler()
+                self.data_change_handler(
+                    {
+                        "kind": GameJournalRecords.SCORE,
+                        "player": player,
+                        "score": score,
+                    }
+                )
 
     def force_score(self, player, score, game_time=None):
         """Force score for a player.
@@ -192,7 +207,7 @@ class GamePersistData:
            Player number
         score: int
            New score
-        game_time: int
+        game_time: float
            Current game time in seconds
         """
         if player not in self.player_data:
@@ -219,7 +234,7 @@ class GamePersistData:
 
         Args
         ----
-        remaining_time: int
+        remaining_time: float
            Game duration
         """
         # doesnt change the current status for now, but i think it should
@@ -244,9 +259,9 @@ class GamePersistData:
             Reason for end of game
         winner: int
             Winner player number
-        running_time: int
+        running_time: float
             Current game time in seconds
-        remaining_time: int
+        remaining_time: float
             Remaining time at end, in seconds
         """
         # if self.data_change_handler:
@@ -295,16 +310,17 @@ class GamePersistData:
         save: bool
            Whether to save to disk immediately
         """
-        self.events.append(
-            {
-                "evt_type": evt_type,
-                "evt_desc": evt_desc,
-                "evt_time": str(datetime.datetime.now()),
-            }
-        )
+        event = {
+            "evt_type": evt_type,
+            "evt_desc": evt_desc,
+            "evt_time": str(datetime.datetime.now()),
+        }
+        self.events.append(event)
 
         if save is True and self.data_change_handler is not None:
-            self.data_change_handler()
+            self.data_change_handler(
+                {"kind": GameJournalRecords.EVENT, "event": event}
+            )
         IPC_HANDLER.publish_event(evt_type, evt_desc)
         if self._live_updates and self.central_game_id is not None:
             live_game.push_event(self.central_game_id, evt_type, evt_desc)
@@ -336,22 +352,33 @@ class GamePersistData:
 class GamePersistance:
     """Game persistance data wrapper class."""
 
-    def __init__(self, folder):
+    JOURNAL_EXTENSION = ".journal"
+
+    def __init__(self, folder, journal=True, fsync_batch=1, cache_size=16):
         """Initialize.
 
         Args
         ----
         folder: str
            Path where game persistance files are stored
+        journal: bool
+           Append changes to a journal instead of rewriting the game file
+        fsync_batch: int
+           Force journal to disk every N records, 0 never forces
+        cache_size: int
+           How many past games are kept in memory
         """
         self.logger = logging.getLogger("sboard.gpersist")
         if not os.path.isabs(folder):
             folder = os.path.join(".", folder)
         self.path = folder
-        self.game_history = {}
+        self.game_history = GameHistory(folder, cache_size)
         self.current_game = None
         self.current_game_series = 0
         self._test_mode = False
+        self._use_journal = journal
+        self._fsync_batch = fsync_batch
+        self._journal = None
 
         self.load_history()
 
@@ -382,22 +409,14 @@ class GamePersistance:
             self.logger.error("Could not load individual game persistances")
             return
 
+        # recover games that were interrupted before being compacted
         for fname in os.listdir(self.path):
-            if os.path.isfile(os.path.join(self.path, fname)):
-                file_uuid, _ = os.path.splitext(fname)
-
-                try:
-                    with open(os.path.join(self.path, fname), "r") as game:
-                        game_data = json.load(game)
-                except (OSError, json.JSONDecodeError):
-                    # raise
-                    self.logger.warning(
-                        "Could not load game "
-                        "persistance for game {}".format(fname)
-                    )
-                    continue
+            file_uuid, ext = os.path.splitext(fname)
+            if ext == self.JOURNAL_EXTENSION:
+                self._recover_journal(file_uuid)
 
-                self.game_history[file_uuid] = game_data
+        # games are loaded on demand
+        self.game_history.load()
 
     def new_record(self, players, game_uid=None, central_game_uid=None):
         """Create new game record.
@@ -407,20 +426,158 @@ class GamePersistance:
         players: dict
             Player dictionary
         """
+        # a previous game was left open, compact it
+        if self.current_game is not None:
+            self._close_journal()
+            self.game_history.release(self.current_game)
+
         game_uuid = "{s:06d}".format(s=self.current_game_series)
         self.current_game_series += 1
         self.current_game = game_uuid
         self.game_history[game_uuid] = GamePersistData(
             players,
-            self.save_current_data,
+            self._game_data_changed,
             self.current_game_series,
             game_uid,
             central_game_uid,
         )
-        self.save_current_data()
+        # initial snapshot, further changes go into the journal
+        if self.save_current_data():
+            self.game_history.update_entry(game_uuid)
+
+        if self._use_journal:
+            try:
+                self._journal = GameJournal(
+                    self._journal_path(game_uuid), self._fsync_batch
+                )
+            except GameJournalError:
+                self.logger.error(
+                    "Could not open game journal, saving full snapshots"
+                )
+                self._journal = None
 
         return game_uuid
 
+    def _journal_path(self, game_uuid):
+        """Get journal path for a game."""
+        return os.path.join(self.path, game_uuid + self.JOURNAL_EXTENSION)
+
+    def _game_data_changed(self, record=None):
+        """Record a change to the current game.
+
+        Args
+        ----
+        record: dict
+           Description of the change
+        """
+        if self._journal is None or record is None:
+            self.save_current_data()
+            return
+
+        try:
+            self._journal.append(record)
+        except GameJournalError:
+            self.logger.error("Could not append to journal, saving snapshot")
+            self.save_current_data()
+
+    def _close_journal(self):
+        """Compact current game into a snapshot and drop its journal."""
+        if self._journal is None:
+            return
+
+        # journal is only removed if the snapshot made it to disk
+        saved = self.save_current_data()
+        self._journal.close(remove=saved)
+        self._journal = None
+
+    @staticmethod
+    def _replay_journal(game_data, records):
+        """Apply journal records to a serialized game.
+
+        Args
+        ----
+        game_data: dict
+           Serialized game, as written by save_current_data
+        records: list
+           Journal records
+        """
+        for record in records:
+            kind = record.get("kind")
+            if kind == GameJournalRecords.USER_ID:
+                game_data["game_data"]["user_id"] = record["user_id"]
+            elif kind == GameJournalRecords.SCORE:
+                player = game_data["player_data"].get(str(record["player"]))
+                if player is not None:
+                    player["score"] = record["score"]
+            elif kind == GameJournalRecords.EVENT:
+                event = record["event"]
+                game_data["events"].append(event)
+                evt_type = event["evt_type"]
+                evt_desc = event["evt_desc"]
+                if evt_type in (
+                    GameEventTypes.SCORE_CHANGE,
+                    GameEventTypes.SCORE_FORCED,
+                ):
+                    player = game_data["player_data"].get(
+                        str(evt_desc["player"])
+                    )
+                    if player is not None:
+                        player["score"] = evt_desc["new_score"]
+                elif evt_type == GameEventTypes.GAME_PAUSE:
+                    game_data["game_state"] = GamePersistStates.NAMES[
+                        GamePersistStates.PAUSED
+                    ]
+                elif evt_type == GameEventTypes.GAME_UNPAUSE:
+                    game_data["game_state"] = GamePersistStates.NAMES[
+                        GamePersistStates.RUNNING
+                    ]
+                elif evt_type == GameEventTypes.GAME_END:
+                    game_data["game_state"] = GamePersistStates.NAMES[
+                        GamePersistStates.FINISHED
+                    ]
+
+        return game_data
+
+    def _recover_journal(self, game_uuid):
+        """Replay a leftover journal into its snapshot.
+
+        Args
+        ----
+        game_uuid: str
+           Game identifier
+        """
+        journal_path = self._journal_path(game_uuid)
+        snapshot_path = os.path.join(self.path, game_uuid + ".json")
+        self.logger.warning(
+            "Recovering game {} from journal".format(game_uuid)
+        )
+        try:
+            with open(snapshot_path, "r") as data:
+                game_data = json.load(data)
+            records = GameJournal.read(journal_path)
+        except (OSError, json.JSONDecodeError, GameJournalError):
+            self.logger.error(
+                "Could not recover game {} from journal".format(game_uuid)
+            )
+            return
+
+        try:
+            game_data = self._replay_journal(game_data, records)
+        except (KeyError, TypeError):
+            self.logger.error(
+                "Journal for game {} is inconsistent".format(game_uuid)
+            )
+            return
+
+        try:
+            # journal is only removed once the snapshot is safely on disk
+            write_json(snapshot_path, game_data, indent=4)
+            os.remove(journal_path)
+        except OSError:
+            self.logger.error(
+                "Could not compact journal for game {}".format(game_uuid)
+            )
+
     def log_event(self, evt_type, evt_desc):
         """Log an event.
 
@@ -441,7 +598,7 @@ class GamePersistance:
 
         Args
         ----
-        remaining_time: int
+        remaining_time: float
            Game clock duration
         """
         try:
@@ -458,9 +615,9 @@ class GamePersistance:
            unknown
         winner: int
            Winner player number
-        running_time: int
+        running_time: float
            Current game time in seconds
-        remaining_time: int
+        remaining_time: float
            Remaining time in seconds
         """
         try:
@@ -470,6 +627,9 @@ class GamePersistance:
         except KeyError:
             return
 
+        # compact journal into final game file
+        self._close_journal()
+        self.game_history.release(self.current_game)
         self.current_game = None
 
     def pause_unpause_game(self):
@@ -490,7 +650,7 @@ class GamePersistance:
            Current score
         force_update: bool
            Forced update or not
-        game_time: int
+        game_time: float
            Current game time in seconds
         """
         try:
@@ -524,13 +684,17 @@ class GamePersistance:
             pass
 
     def save_current_data(self):
-        """Save data immediately."""
+        """Save data immediately.
+
+        Returns whether the current game snapshot was written.
+        """
         # save game series number
         try:
-            with open(os.path.join(self.path, "game.json"), "w") as data:
-                json.dump(
-                    {"current_series": self.current_game_series}, data, indent=4
-                )
+            write_json(
+                os.path.join(self.path, "game.json"),
+                {"current_series": self.current_game_series},
+                indent=4,
+            )
         except OSError:
             self.logger.error("Could not save overall game persistance state")
 
@@ -538,14 +702,25 @@ class GamePersistance:
             file_name = os.path.join(self.path, self.current_game + ".json")
 
             try:
-                with open(file_name, "w") as data:
-                    json.dump(
-                        self.game_history[self.current_game].serialized,
-                        data,
-                        indent=4,
-                    )
+                write_json(
+                    file_name,
+                    self.game_history[self.current_game].serialized,
+                    indent=4,
+                )
             except OSError:
                 self.logger.error("Could not save game persistance data")
+                return False
+
+            return True
+
+        return False
+
+    def close(self):
+        """Flush and compact current game before exiting."""
+        if self.current_game is None:
+            return
+        self._close_journal()
+        self.game_history.update_entry(self.current_game)
 
     def assign_user_id(self, user_id):
         """Assign user id to current game.
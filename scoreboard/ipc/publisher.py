@@ -1,26 +1,57 @@
 """Event publisher."""
 
+import threading
 import time
 import zmq
 
 from collections import deque
 
+from scoreboard.util.metrics import METRICS
 from scoreboard.util.threads import StoppableThread
 
 
 class ChainballEventPublisher(StoppableThread):
-    """Event publisher."""
+    """Event publisher.
 
-    def __init__(self, port):
+    Events are published as (evt_type, evt_data, seq), where seq increases
+    by one for every event so that subscribers can detect gaps. In batch
+    mode, all events pending at a wakeup are sent in a single
+    ("batch", [(evt_type, evt_data, seq), ...]) message.
+    """
+
+    BATCH_EVENT = "batch"
+
+    def __init__(self, port, batch=False):
         """Initialize."""
         super().__init__()
         self._port = port
         self._queue = deque()
+        self._cond = threading.Condition()
+        self._seq = 0
+        self.batch = batch
 
     def publish(self, evt_type, evt_data):
         """Publish event."""
-        event = (evt_type, evt_data)
-        self._queue.append(event)
+        event = (evt_type, evt_data, time.monotonic())
+        with self._cond:
+            self._queue.append(event)
+            self._cond.notify()
+
+    def stop(self):
+        """Stop publisher."""
+        super().stop()
+        with self._cond:
+            self._cond.notify()
+
+    def _drain(self):
+        """Wait for events and take all of them."""
+        with self._cond:
+            while not self._queue and not self.is_stopped():
+                self._cond.wait()
+            pending = list(self._queue)
+            self._queue.clear()
+
+        return pending
 
     def run(self):
         """Run publisher."""
@@ -29,13 +60,25 @@ class ChainballEventPublisher(StoppableThread):
         pub_socket.bind("tcp://127.0.0.1:{}".format(self._port))
 
         while not self.is_stopped():
-            time.sleep(0.1)
-
-            try:
-                evt_type, evt_data = self._queue.popleft()
-            except IndexError:
+            pending = self._drain()
+            if not pending:
                 continue
 
-            pub_socket.send_json((evt_type, evt_data))
+            messages = []
+            for evt_type, evt_data, _ in pending:
+                messages.append((evt_type, evt_data, self._seq))
+                self._seq += 1
+
+            if self.batch:
+                pub_socket.send_json((self.BATCH_EVENT, messages))
+            else:
+                for message in messages:
+                    pub_socket.send_json(message)
+
+            sent = time.monotonic()
+            for _, _, published in pending:
+                METRICS.observe("ipc.publish_latency", sent - published)
+            METRICS.increment("ipc.events_published", len(pending))
+            METRICS.observe("ipc.publish_batch_size", len(pending))
 
         pub_socket.close()
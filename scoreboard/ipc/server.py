@@ -30,7 +30,11 @@ from scoreboard.ipc import (
     ipc_ok_response,
 )
 from scoreboard.ipc.publisher import ChainballEventPublisher
+from scoreboard.remote.persistence import PERSISTENT_REMOTE_DATA
+from scoreboard.util.configfiles import CHAINBALL_CONFIGURATION
+from scoreboard.util.metrics import METRICS
 from scoreboard.util.threads import StoppableThread
+from scoreboard.util.wakeup import GAME_WAKEUP, WakeupSources
 
 DEBUG = True
 
@@ -87,6 +91,8 @@ class ChainballMainIPC(StoppableThread):
                 response = (self.RESPONSE_ERROR, self.ERROR_INTERNAL)
 
             rep_socket.send_json(response)
+            # request may have changed game state
+            GAME_WAKEUP.post(WakeupSources.IPC)
 
         # cleanup
         rep_socket.close()
@@ -122,6 +128,16 @@ class ChainballMainIPC(StoppableThread):
             raise ChainballIPCInternalError("internal error occurred")
         return response
 
+    @staticmethod
+    def ipc_metrics(game, **req_data):
+        """Get performance metrics."""
+        return ipc_ok_response(METRICS.summary())
+
+    @staticmethod
+    def ipc_remote_telemetry(game, **req_data):
+        """Get remote battery levels and activity."""
+        return ipc_ok_response(PERSISTENT_REMOTE_DATA.get_telemetry())
+
     @staticmethod
     def ipc_game_can_start(game, **req_data):
         """Get whether game can start."""
@@ -392,6 +408,8 @@ class ChainballIPCHandler:
         """Start handler."""
         if self._running:
             return
+        scoreboard_config = CHAINBALL_CONFIGURATION.scoreboard
+        self._evt_pub.batch = scoreboard_config.get("batch_events", False)
         self._evt_pub.start()
         self._main_ipc.start()
         self._running = True
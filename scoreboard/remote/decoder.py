@@ -5,36 +5,45 @@ import struct
 from scoreboard.remote.constants import RemoteCommands
 from scoreboard.remote.persistence import PERSISTENT_REMOTE_DATA
 
+# remote id, command, command data
+_REMOTE_MESSAGE = struct.Struct("<IBB")
+
 
 class RemoteDecoder(object):
     """Decoder class."""
 
+    __slots__ = ("remote_id", "command", "cmd_data")
+
     def __init__(self, message):
-        """Iniialize."""
+        """Iniialize.
+
+        Args
+        ----
+        message: bytes or memoryview
+           Radio payload
+        """
         self.remote_id, self.command, self.cmd_data = self.decode(message)
 
     @classmethod
     def decode(cls, message):
         """Decode message."""
-        buf = "".join([chr(x) for x in message])
-        remote_id = struct.unpack_from("I", buf, 0)[0]
-        command = message[4]
-        command_data = message[5]
+        try:
+            remote_id, command, command_data = _REMOTE_MESSAGE.unpack_from(
+                message
+            )
+        except (struct.error, TypeError):
+            raise IOError("Invalid message")
 
         if remote_id == 0:
             raise IOError("Invalid message")
 
         # persistence hack
-        if PERSISTENT_REMOTE_DATA.is_known(remote_id):
-            if command == RemoteCommands.BATT:
-                # update last known battery level
-                PERSISTENT_REMOTE_DATA.upd_data(remote_id, command_data)
-        else:
-            if command == RemoteCommands.BATT:
-                save_data = command_data
-            else:
-                save_data = None
-            PERSISTENT_REMOTE_DATA.add_remote(remote_id, save_data)
+        PERSISTENT_REMOTE_DATA.seen(remote_id)
+        if command == RemoteCommands.BATT:
+            # update last known battery level
+            PERSISTENT_REMOTE_DATA.upd_data(remote_id, command_data)
+        elif not PERSISTENT_REMOTE_DATA.is_known(remote_id):
+            PERSISTENT_REMOTE_DATA.add_remote(remote_id)
 
         return remote_id, command, command_data
 
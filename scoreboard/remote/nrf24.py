@@ -1,31 +1,125 @@
 """NRF24 controller."""
 
+import functools
 import logging
 import queue as Queue
+import threading
 import time
+from collections import deque
 
 import scoreboard.remote.nrf24const as rf
 from scoreboard.util.threads import StoppableThread
+from scoreboard.util.wakeup import GAME_WAKEUP, WakeupSources
 
 # constants
 CE_PIN_GPIO = 1
-HW_COMM_SLEEP = 0.0001
 NRF_PAYLOAD_SIZE = 32
+# minimum CSN high time between SPI transactions (tCWH), in seconds
+NRF_MIN_TRANSACTION_GAP = 50e-9
+# longer waits sleep instead of spinning
+_PACING_SPIN_LIMIT = 0.0002
+
+# poll this often even in IRQ mode, in case an edge is missed
+IRQ_WAIT_TIMEOUT = 1.0
 
 
 def _hw_comm_delay(func):
-    """Delay HW transactions."""
-    time.sleep(HW_COMM_SLEEP)
-    return func
+    """Pace HW transactions according to the chip's pacing policy."""
+
+    @functools.wraps(func)
+    def paced(self, *args, **kwargs):
+        self._pace()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._last_transaction = time.perf_counter()
+
+    return paced
+
+
+class GPIOIRQSource:
+    """NRF24 IRQ line on a GPIO pin (active low)."""
+
+    def __init__(self, gpio, pin):
+        """Initialize."""
+        self.gpio = gpio
+        self.pin = pin
+        self.gpio.setup(pin, gpio.IN, pull_up_down=gpio.PUD_UP)
+
+    def wait(self, timeout):
+        """Wait for IRQ, returns whether it is asserted."""
+        if self.gpio.input(self.pin) == 0:
+            # already asserted
+            return True
+
+        channel = self.gpio.wait_for_edge(
+            self.pin, self.gpio.FALLING, timeout=int(timeout * 1000)
+        )
+        return channel is not None
+
+    def wake(self):
+        """Wake up a waiting thread."""
+        # waits are bounded by their timeout
+
+
+class SimulatedIRQSource:
+    """IRQ line of the fake hardware."""
+
+    def __init__(self):
+        """Initialize."""
+        self._event = threading.Event()
+
+    def trigger(self):
+        """Assert IRQ."""
+        self._event.set()
+
+    def wait(self, timeout):
+        """Wait for IRQ, returns whether it is asserted."""
+        asserted = self._event.wait(timeout)
+        self._event.clear()
+        return asserted
+
+    def wake(self):
+        """Wake up a waiting thread."""
+        self._event.set()
 
 
 class NRF24Chip:
     """NRF24 Controller class."""
 
-    def __init__(self, bus, select, message_cb=None, fake_hw=False):
-        """Initialize."""
+    def __init__(
+        self,
+        bus,
+        select,
+        message_cb=None,
+        fake_hw=False,
+        irq_pin=None,
+        spi_pacing=NRF_MIN_TRANSACTION_GAP,
+    ):
+        """Initialize.
+
+        Args
+        ----
+        bus: int
+           SPI bus
+        select: int
+           SPI chip select
+        message_cb: callable
+           Called with each received payload
+        fake_hw: bool
+           Simulate the chip; payloads are injected with simulate_rx
+        irq_pin: int
+           GPIO pin wired to the IRQ line, None to poll
+        spi_pacing: float
+           Minimum time between SPI transactions, in seconds
+        """
         self.logger = logging.getLogger("sboard.nrf24")
         self.fake_hw = fake_hw
+        self.irq = None
+        self.spi_pacing = spi_pacing
+        self._last_transaction = 0.0
+        # reusable transfer buffers, by (register, size)
+        self._read_requests = {}
 
         if fake_hw is False:
             import RPi.GPIO as gpio
@@ -52,9 +146,31 @@ class NRF24Chip:
             self.gpio.setup(CE_PIN_GPIO, self.gpio.OUT)
             self.gpio.output(CE_PIN_GPIO, False)
 
+            if irq_pin is not None:
+                try:
+                    self.irq = GPIOIRQSource(self.gpio, irq_pin)
+                except RuntimeError:
+                    self.logger.warning("cannot use IRQ pin, polling")
+        else:
+            # simulated RX FIFO
+            self._fake_fifo = deque()
+            self.irq = SimulatedIRQSource()
+
         self.pay_size = NRF_PAYLOAD_SIZE
         self.msg_cb = message_cb
 
+    def _pace(self):
+        """Wait until the next SPI transaction is allowed."""
+        deadline = self._last_transaction + self.spi_pacing
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        if remaining > _PACING_SPIN_LIMIT:
+            time.sleep(remaining)
+        else:
+            while time.perf_counter() < deadline:
+                pass
+
     def set_ce(self):
         """Enable chip select."""
         self.gpio.output(CE_PIN_GPIO, True)
@@ -86,11 +202,15 @@ class NRF24Chip:
 
     @_hw_comm_delay
     def read_regdata(self, reg_num, read_size):
-        """Read multi word register data."""
-        dummy_write = [(rf.CMD_R_REG | reg_num) & 0xFF] + [
-            0x00 for x in range(read_size)
-        ]
-        return self.spi_dev.xfer2(dummy_write)
+        """Read multi word register data.
+
+        The first word returned is the STATUS register.
+        """
+        request = self._read_requests.get((reg_num, read_size))
+        if request is None:
+            request = [(rf.CMD_R_REG | reg_num) & 0xFF] + [0x00] * read_size
+            self._read_requests[(reg_num, read_size)] = request
+        return self.spi_dev.xfer2(request)
 
     @_hw_comm_delay
     def write_regdata(self, reg_num, data):
@@ -111,8 +231,8 @@ class NRF24Chip:
         return self.writeread(rf.CMD_NOP)[0]
 
     def reset_irq(self, flags):
-        """Clear interrupts."""
-        self.write_reg(rf.REG_STATUS, flags)
+        """Clear interrupts, returns STATUS before clearing."""
+        return self.write_reg(rf.REG_STATUS, flags)
 
     def tx_payload(self, payload):
         """Send data payload."""
@@ -171,40 +291,42 @@ class NRF24Chip:
         self.rx_powerup()
         self.set_ce()
 
+    def simulate_rx(self, payload):
+        """Receive payload on the fake hardware."""
+        self._fake_fifo.append(payload)
+        self.irq.trigger()
+
     def poll(self):
         """Check for new data reception."""
         if self.fake_hw:
+            while self._fake_fifo:
+                if self.msg_cb:
+                    self.msg_cb(self._fake_fifo.popleft())
             return
 
-        status = self.get_status()
-
-        if status & rf.STATUS_RX_DR:
-            # receive payload
-            payload = self.rx_payload()
-            self.logger.debug(
-                "incoming transmission, len = {}".format(len(payload) - 1)
-            )
-            # callback
-            if self.msg_cb:
-                self.msg_cb(payload[1:])
-
-            self.reset_irq(rf.STATUS_RX_DR | rf.STATUS_TX_DS | rf.STATUS_MAX_RT)
+        # clearing the flags also reads STATUS; packets arriving later set
+        # RX_DR again, so none are missed
+        status = self.reset_irq(
+            rf.STATUS_RX_DR | rf.STATUS_TX_DS | rf.STATUS_MAX_RT
+        )
 
-        if status & rf.STATUS_TX_DS:
-            self.reset_irq(rf.STATUS_TX_DS)
-        if status & rf.STATUS_MAX_RT:
-            self.reset_irq(rf.STATUS_MAX_RT)
+        if (status & rf.STATUS_RX_P_NO) == rf.STATUS_RX_P_NO_RX_FIFO_EMPTY:
+            return
 
-        # check if there are packets in fifo
-        while self.read_reg(rf.REG_FIFO_STATUS) & 0x01 == 0:
-            # receive payload
+        while True:
             payload = self.rx_payload()
+            # STATUS is shifted out before the payload is read
+            if (
+                payload[0] & rf.STATUS_RX_P_NO
+            ) == rf.STATUS_RX_P_NO_RX_FIFO_EMPTY:
+                break
             self.logger.debug(
                 "incoming payload from FIFO, len = {}".format(len(payload) - 1)
             )
 
             if self.msg_cb:
-                self.msg_cb(payload[1:])
+                # spidev returns a list, decoders want a buffer
+                self.msg_cb(memoryview(bytes(payload))[1:])
 
 
 class NRF24Message:
@@ -214,6 +336,8 @@ class NRF24Message:
         """Initialize."""
         self.payload = payload
         self.timestamp = time.time()
+        # for latency measurements
+        self.received = time.monotonic()
 
 
 class NRF24Handler(StoppableThread):
@@ -222,15 +346,39 @@ class NRF24Handler(StoppableThread):
     ADDRESS = [0x11, 0x22, 0x33, 0x44, 0x55]
     CHANNEL = 2
 
-    def __init__(self, fake_hw=False):
-        """Initialize."""
+    def __init__(
+        self, fake_hw=False, irq_pin=None, poll_interval=0.1, spi_pacing=None
+    ):
+        """Initialize.
+
+        Args
+        ----
+        fake_hw: bool
+           Simulate the radio
+        irq_pin: int
+           GPIO pin wired to the IRQ line, None to poll
+        poll_interval: float
+           Polling period when not using the IRQ line, in seconds
+        spi_pacing: float
+           Minimum time between SPI transactions, None for the chip minimum
+        """
         super(NRF24Handler, self).__init__()
 
         # logging
         self.logger = logging.getLogger("sboard.remote")
 
         # create SPI device
-        self.chip = NRF24Chip(0, 0, self._message_callback, fake_hw=fake_hw)
+        if spi_pacing is None:
+            spi_pacing = NRF_MIN_TRANSACTION_GAP
+        self.chip = NRF24Chip(
+            0,
+            0,
+            self._message_callback,
+            fake_hw=fake_hw,
+            irq_pin=irq_pin,
+            spi_pacing=spi_pacing,
+        )
+        self.poll_interval = poll_interval
 
         # initialize HW
         self.initialize_hardware()
@@ -253,6 +401,7 @@ class NRF24Handler(StoppableThread):
         except TypeError:
             self.logger.debug("Payload is wrong type, dump: {}".format(payload))
         self.msg_q.put(NRF24Message(payload))
+        GAME_WAKEUP.post(WakeupSources.REMOTE)
 
     def message_pending(self):
         """Check if there are pending messages."""
@@ -262,22 +411,36 @@ class NRF24Handler(StoppableThread):
         """Receive message."""
         return self.msg_q.get()
 
+    def receive_all(self):
+        """Receive all pending messages, in arrival order."""
+        messages = []
+        while True:
+            try:
+                messages.append(self.msg_q.get_nowait())
+            except Queue.Empty:
+                break
+
+        return messages
+
     def flush_message_queue(self):
         """Flush message queue."""
         while self.message_pending():
             self.receive_message()
 
+    def stop(self):
+        """Stop handler."""
+        super().stop()
+        if self.chip.irq is not None:
+            self.chip.irq.wake()
+
     def run(self):
         """Run thread cycle."""
-        # poll continuously to detect reception
-        while True:
-
-            if self.is_stopped():
-                # quit
-                exit(0)
+        while not self.is_stopped():
+            if self.chip.irq is not None:
+                # sleep until the chip signals reception
+                self.chip.irq.wait(IRQ_WAIT_TIMEOUT)
+            else:
+                time.sleep(self.poll_interval)
 
             # execute low-level cycle
             self.chip.poll()
-
-            # throttle cycle
-            time.sleep(0.1)
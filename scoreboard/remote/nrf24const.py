@@ -48,6 +48,7 @@ STATUS_TX_DS = 0x20
 STATUS_MAX_RT = 0x10
 STATUS_RX_P_NO = 0x0E
 STATUS_RX_P_NO_RX_FIFO_NOT_EMPTY = 0x0E
+STATUS_RX_P_NO_RX_FIFO_EMPTY = 0x0E
 STATUS_RX_P_NO_UNUSED = 0x0C
 STATUS_RX_P_NO_5 = 0x0A
 STATUS_RX_P_NO_4 = 0x08
@@ -3,13 +3,25 @@
 import time
 import logging
 from scoreboard.remote.constants import RemotePairStates, RemotePairFailureType
+from scoreboard.util.wakeup import GAME_WAKEUP
 
 
 class RemotePairHandler(object):
     """Pairing handler."""
 
-    def __init__(self, fail_cb=None, success_cb=None):
-        """Initialize."""
+    def __init__(self, fail_cb=None, success_cb=None, pair_track=None):
+        """Initialize.
+
+        Args
+        ----
+        fail_cb: callable
+           Called with the player and failure type when pairing fails
+        success_cb: callable
+           Called with the player and remote id when pairing succeeds
+        pair_track: dict
+           Paired remotes, remote id -> player, shared with the owner so
+           that there is a single table to keep up to date
+        """
         self.logger = logging.getLogger("sboard.pairHandler")
         self.state = RemotePairStates.IDLE
         self.player_pair = None
@@ -18,7 +30,7 @@ class RemotePairHandler(object):
         self.fail_callback = fail_cb
         self.success_callback = success_cb
         self.fail_reason = None
-        self.pair_track = {}
+        self.pair_track = pair_track if pair_track is not None else {}
 
     def start_pair(self, player, pair_timeout):
         """Start remote pairing."""
@@ -28,11 +40,11 @@ class RemotePairHandler(object):
         self.player_pair = player
         self.fail_reason = None
         self.state = RemotePairStates.RUNNING
+        GAME_WAKEUP.schedule_in(pair_timeout)
 
     def stop_tracking(self, remote_id):
         """Stop tracking a remote."""
-        if remote_id in self.pair_track.keys():
-            del self.pair_track[remote_id]
+        self.pair_track.pop(remote_id, None)
 
     def is_running(self):
         """Get current state."""
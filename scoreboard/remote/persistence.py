@@ -1,42 +1,158 @@
 """Persist remote statistics."""
 
 import json
+import logging
+import os
+import threading
+import time
+from collections import deque
 
+from scoreboard.util.threads import StoppableThread
 
-class RemotePersistence(object):
-    """Persistence data container."""
+# battery readings kept in memory per remote
+_HISTORY_SIZE = 16
+
+
+class _RemoteFlusher(StoppableThread):
+    """Periodically write remote data to disk."""
 
-    def __init__(self, persistence_file):
+    def __init__(self, persistence, interval):
         """Initialize."""
+        super().__init__()
+        self._persistence = persistence
+        self._interval = interval
+
+    def run(self):
+        """Run flusher."""
+        while not self.stop_flag.wait(self._interval):
+            self._persistence.flush()
+
+        self._persistence.flush()
+
+
+class RemotePersistence(object):
+    """Persistence data container.
+
+    Data is kept in memory and written to disk by flush(), which only
+    touches the file when a stored value changed. Recent battery readings
+    and the time each remote was last heard from are kept in memory only.
+    """
+
+    def __init__(self, persistence_file, history_size=_HISTORY_SIZE):
+        """Initialize.
+
+        Args
+        ----
+        persistence_file: str
+           Path of the persistence file
+        history_size: int
+           Battery readings kept per remote
+        """
+        self.logger = logging.getLogger("sboard.rpersist")
         self.pfile = persistence_file
+        self._history_size = history_size
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._history = {}
+        self._last_seen = {}
+        self._flusher = None
 
         try:
             with open(persistence_file, "r") as f:
                 self.remote_list = json.load(f)
-        except:
+        except (OSError, ValueError):
             self.remote_list = {}
 
-    def _do_save(self):
-        with open(self.pfile, "w") as f:
-            json.dump(self.remote_list, f)
+    def _do_save(self, data):
+        directory = os.path.dirname(self.pfile)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = self.pfile + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.pfile)
+
+    def start(self, flush_interval):
+        """Start writing to disk periodically.
+
+        Args
+        ----
+        flush_interval: float
+           Time between writes, in seconds
+        """
+        if self._flusher is not None:
+            return
+        self._flusher = _RemoteFlusher(self, flush_interval)
+        self._flusher.start()
+
+    def stop(self):
+        """Stop periodic writes, saving pending changes."""
+        if self._flusher is None:
+            self.flush()
+            return
+        self._flusher.stop()
+        self._flusher.join()
+        self._flusher = None
+
+    def flush(self):
+        """Write data to disk if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self.remote_list)
+            self._dirty = False
+
+        try:
+            self._do_save(data)
+        except OSError:
+            self.logger.error("could not save remote persistence data")
+            with self._lock:
+                self._dirty = True
 
     def is_known(self, remote_id):
         """Check if remote id is known."""
         return hex(remote_id) in self.remote_list
 
+    def seen(self, remote_id):
+        """Record that a remote was heard from."""
+        self._last_seen[hex(remote_id)] = time.time()
+
     def add_remote(self, remote_id, data=None):
         """Add new remote id."""
-        self.remote_list[hex(remote_id)] = data
-        self._do_save()
+        self._store(hex(remote_id), data)
 
     def upd_data(self, remote_id, data):
         """Update data by remote id."""
-        self.remote_list[hex(remote_id)] = data
-        self._do_save()
+        remote = hex(remote_id)
+        self._store(remote, data)
+
+        history = self._history.get(remote)
+        if history is None:
+            history = deque(maxlen=self._history_size)
+            self._history[remote] = history
+        history.append((time.time(), data))
+
+    def _store(self, remote, data):
+        with self._lock:
+            if remote in self.remote_list and self.remote_list[remote] == data:
+                return
+            self.remote_list[remote] = data
+            self._dirty = True
 
     def get_remote_persist(self):
         """Get persistence data."""
         return self.remote_list
 
+    def get_telemetry(self):
+        """Get battery level, recent readings and last seen time by remote."""
+        return {
+            remote: {
+                "battery": data,
+                "history": list(self._history.get(remote, ())),
+                "last_seen": self._last_seen.get(remote),
+            }
+            for remote, data in list(self.remote_list.items())
+        }
+
 
 PERSISTENT_REMOTE_DATA = RemotePersistence("userdata/persist/remote.json")
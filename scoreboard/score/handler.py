@@ -4,9 +4,8 @@ import logging
 import os
 import pty
 import queue as Queue
-import struct
 import threading
-import time
+from collections import OrderedDict
 
 import serial
 from scoreboard.score.constants import (
@@ -14,6 +13,7 @@ from scoreboard.score.constants import (
     PlayerScoreConstraints,
 )
 from scoreboard.score.exceptions import TextTooBigError
+from scoreboard.util.metrics import METRICS
 from scoreboard.util.threads import StoppableThread
 
 
@@ -73,74 +73,57 @@ class ScoreHandler(StoppableThread):
         # running flag
         self.is_running = threading.Event()
 
-    def _write_score(self, player, score):
-        buf = struct.pack(
-            "4s",
-            bytes(
-                [
-                    player,
-                    PlayerScoreCommands.SCORE,
-                    score,
-                    PlayerScoreCommands.TERM,
-                ]
-            ),
+    @staticmethod
+    def _score_cmd(player, score):
+        return bytes(
+            [player, PlayerScoreCommands.SCORE, score, PlayerScoreCommands.TERM]
         )
-        self.ser_port.write(buf)
 
-    def _clear_score(self, player):
-        self.logger.debug("issuing CLR to player {}".format(player))
-        buf = struct.pack(
-            "3s",
-            bytes([player, PlayerScoreCommands.CLR, PlayerScoreCommands.TERM]),
-        )
-        self.ser_port.write(buf)
+    @staticmethod
+    def _clear_cmd(player):
+        return bytes([player, PlayerScoreCommands.CLR, PlayerScoreCommands.TERM])
 
-    def _set_turn(self, player):
-        buf = struct.pack(
-            "3s",
-            bytes([player, PlayerScoreCommands.TURN, PlayerScoreCommands.TERM]),
+    @staticmethod
+    def _turn_cmd(player):
+        return bytes(
+            [player, PlayerScoreCommands.TURN, PlayerScoreCommands.TERM]
         )
-        self.ser_port.write(buf)
-
-    def _set_text(self, player, text):
-        self.logger.debug("setting text: player {} -> {}".format(player, text))
-        buf = struct.pack(
-            "ccc{}sc".format(len(text)),
-            bytes([player]),
-            bytes([PlayerScoreCommands.DATA]),
-            bytes([len(text)]),
-            text.encode(),
-            bytes([PlayerScoreCommands.TERM]),
+
+    @staticmethod
+    def _text_cmd(player, text):
+        encoded = text.encode()
+        return (
+            bytes([player, PlayerScoreCommands.DATA, len(encoded)])
+            + encoded
+            + bytes([PlayerScoreCommands.TERM])
         )
-        self.ser_port.write(buf)
-
-    def _set_mode(self, player, mode):
-        buf = struct.pack(
-            "4s",
-            bytes(
-                [
-                    player,
-                    PlayerScoreCommands.MODE,
-                    mode,
-                    PlayerScoreCommands.TERM,
-                ]
-            ),
+
+    @staticmethod
+    def _mode_cmd(player, mode):
+        return bytes(
+            [player, PlayerScoreCommands.MODE, mode, PlayerScoreCommands.TERM]
         )
-        self.ser_port.write(buf)
-
-    def _set_blink(self, player, bitfield):
-        buf = struct.pack(
-            "cccc",
-            bytes(
-                [
-                    player,
-                    PlayerScoreCommands.BLINK,
-                    bitfield,
-                    PlayerScoreCommands.TERM,
-                ]
-            ),
+
+    @staticmethod
+    def _blink_cmd(player, bitfield):
+        return bytes(
+            [
+                player,
+                PlayerScoreCommands.BLINK,
+                bitfield,
+                PlayerScoreCommands.TERM,
+            ]
         )
-        self.ser_port.write(buf)
+
+    # event type -> (data length, encoder)
+    _ENCODERS = {
+        ScoreUpdateEventTypes.SCORE_UPD: (2, "_score_cmd"),
+        ScoreUpdateEventTypes.SET_TURN: (1, "_turn_cmd"),
+        ScoreUpdateEventTypes.SET_MODE: (2, "_mode_cmd"),
+        ScoreUpdateEventTypes.SET_TEXT: (2, "_text_cmd"),
+        ScoreUpdateEventTypes.TURN_OFF: (1, "_clear_cmd"),
+        ScoreUpdateEventTypes.BLINK_SCORE: (2, "_blink_cmd"),
+    }
 
     @classmethod
     def check_score_bounds(cls, score):
@@ -233,68 +216,89 @@ class ScoreHandler(StoppableThread):
             ScoreUpdateEvent(ScoreUpdateEventTypes.TURN_OFF, [player])
         )
 
-    def process_queue(self):
-        """Process display command queue."""
-        if not self.evt_q.empty():
-
-            evt = self.evt_q.get()
-
-            if evt.upd_type == ScoreUpdateEventTypes.SCORE_UPD:
-                if len(evt.data) != 2:
-                    # ignore
-                    return
-
-                # set score
-                self._write_score(*evt.data)
-
-            elif evt.upd_type == ScoreUpdateEventTypes.SET_TURN:
-                if len(evt.data) != 1:
-                    # ignore
-                    return
-
-                self._set_turn(evt.data[0])
-
-            elif evt.upd_type == ScoreUpdateEventTypes.SET_MODE:
-                if len(evt.data) != 2:
-                    return
-
-                self._set_mode(*evt.data)
-
-            elif evt.upd_type == ScoreUpdateEventTypes.SET_TEXT:
-                if len(evt.data) != 2:
-                    return
-
-                self._set_text(*evt.data)
-
-            elif evt.upd_type == ScoreUpdateEventTypes.TURN_OFF:
-                if len(evt.data) != 1:
-                    return
-
-                self._clear_score(evt.data[0])
-
-            elif evt.upd_type == ScoreUpdateEventTypes.BLINK_SCORE:
-                if len(evt.data) != 2:
-                    return
+    @staticmethod
+    def _command_key(evt):
+        """Get key under which redundant commands are coalesced."""
+        if evt.upd_type == ScoreUpdateEventTypes.SET_TURN:
+            # only one player has the turn
+            return (evt.upd_type,)
+
+        return (evt.upd_type, evt.data[0])
+
+    def _coalesce(self, events):
+        """Drop commands that are superseded by later ones.
+
+        Only the last command of each kind is kept for each player; it is
+        moved to the position of the last occurrence so that ordering
+        between different commands is preserved.
+        """
+        commands = OrderedDict()
+        for evt in events:
+            encoder = self._ENCODERS.get(evt.upd_type)
+            if encoder is None or len(evt.data) != encoder[0]:
+                # ignore
+                continue
+
+            key = self._command_key(evt)
+            commands.pop(key, None)
+            commands[key] = evt
+
+        return list(commands.values())
+
+    def _encode(self, events):
+        """Encode commands into a single buffer."""
+        buf = bytearray()
+        for evt in events:
+            _, encoder = self._ENCODERS[evt.upd_type]
+            buf += getattr(self, encoder)(*evt.data)
+
+        return buf
+
+    def _write(self, buf):
+        """Write to panels."""
+        if buf:
+            self.ser_port.write(buf)
+            METRICS.observe("score.write_bytes", len(buf))
+
+    def stop(self):
+        """Stop thread."""
+        super(ScoreHandler, self).stop()
+        # wake up
+        self.evt_q.put(None)
+
+    def process_queue(self, block=True):
+        """Process display command queue.
+
+        Waits for a command, then sends everything that is pending in a
+        single write.
+        """
+        try:
+            evt = self.evt_q.get(block=block)
+        except Queue.Empty:
+            return
 
-                self._set_blink(*evt.data)
+        events = []
+        while True:
+            if evt is not None:
+                events.append(evt)
+            try:
+                evt = self.evt_q.get_nowait()
+            except Queue.Empty:
+                break
+
+        commands = self._coalesce(events)
+        METRICS.increment("score.commands_received", len(events))
+        METRICS.increment("score.commands_sent", len(commands))
+        self._write(self._encode(commands))
 
     def run(self):
         """Run thread."""
-        # initialize
-        self._clear_score(0xFF)
-        # set turn to inexistent player
-        self._set_turn(0xFE)
+        # initialize, set turn to inexistent player
+        self._write(self._clear_cmd(0xFF) + self._turn_cmd(0xFE))
 
         self.is_running.set()
 
-        while True:
-
-            if self.is_stopped():
-
-                self.is_running.clear()
-                exit(0)
-
+        while not self.is_stopped():
             self.process_queue()
 
-            # throttle cycle
-            time.sleep(0.1)
+        self.is_running.clear()
@@ -4,6 +4,7 @@ import logging
 import time
 
 from scoreboard.score.constants import PlayerServeStates
+from scoreboard.util.wakeup import GAME_WAKEUP
 
 
 class PlayerScore:
@@ -168,6 +169,7 @@ class PlayerScore:
             )
             self.score_start_timer = time.time()
             self.serve_state = PlayerServeStates.SCORED
+            GAME_WAKEUP.schedule_in(self._serve_timeout)
 
     def reset_serve(self):
         """Reset serve state."""
@@ -0,0 +1,353 @@
+"""Audio output worker."""
+
+import logging
+import subprocess
+import threading
+import time
+import wave
+from collections import OrderedDict, deque
+
+from scoreboard.util.metrics import METRICS
+from scoreboard.util.threads import StoppableThread
+
+# PCM format used throughout: signed 16-bit little endian, stereo
+PCM_RATE = 44100
+PCM_CHANNELS = 2
+PCM_SAMPLE_WIDTH = 2
+PCM_FRAME_SIZE = PCM_CHANNELS * PCM_SAMPLE_WIDTH
+
+# bytes written to the sink at a time
+_CHUNK_SIZE = 4096 * PCM_FRAME_SIZE
+
+# decoded audio kept in memory, in bytes
+DEFAULT_CACHE_SIZE = 32 * 1024 * 1024
+
+AUDIO_LOGGER = logging.getLogger("sboard.audio")
+
+
+class AudioError(Exception):
+    """Audio error."""
+
+
+def decode_pcm(path):
+    """Decode an audio file into PCM data.
+
+    WAV files already in the PCM format are read directly, everything else
+    is decoded with ffmpeg.
+    """
+    try:
+        with wave.open(path, "rb") as wav:
+            if (
+                wav.getframerate() == PCM_RATE
+                and wav.getnchannels() == PCM_CHANNELS
+                and wav.getsampwidth() == PCM_SAMPLE_WIDTH
+            ):
+                return wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        # not a WAV file
+        pass
+    except OSError:
+        raise AudioError("cannot read {}".format(path))
+
+    try:
+        return subprocess.run(
+            [
+                "ffmpeg",
+                "-v",
+                "quiet",
+                "-i",
+                path,
+                "-f",
+                "s16le",
+                "-ac",
+                str(PCM_CHANNELS),
+                "-ar",
+                str(PCM_RATE),
+                "-",
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        raise AudioError("cannot decode {}".format(path))
+
+
+class AudioSink:
+    """Destination of PCM data."""
+
+    # whether the sink consumes data at the playback rate
+    realtime = False
+
+    def write(self, data):
+        """Write PCM data."""
+        raise NotImplementedError
+
+    def close(self):
+        """Close sink."""
+
+
+class NullSink(AudioSink):
+    """Sink that discards audio."""
+
+    def __init__(self):
+        """Initialize."""
+        self.written = 0
+
+    def write(self, data):
+        """Write PCM data."""
+        self.written += len(data)
+
+
+class WavFileSink(AudioSink):
+    """Sink that records audio into a WAV file."""
+
+    def __init__(self, path):
+        """Initialize."""
+        self._path = path
+        self._wav = None
+
+    def write(self, data):
+        """Write PCM data."""
+        if self._wav is None:
+            try:
+                self._wav = wave.open(self._path, "wb")
+            except OSError:
+                raise AudioError("cannot open {}".format(self._path))
+            self._wav.setnchannels(PCM_CHANNELS)
+            self._wav.setsampwidth(PCM_SAMPLE_WIDTH)
+            self._wav.setframerate(PCM_RATE)
+        self._wav.writeframes(data)
+
+    def close(self):
+        """Close sink."""
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class AlsaSink(AudioSink):
+    """Sink that streams audio into a long-lived aplay process."""
+
+    realtime = True
+
+    def __init__(self):
+        """Initialize."""
+        self._process = None
+
+    def write(self, data):
+        """Write PCM data."""
+        if self._process is None or self._process.poll() is not None:
+            try:
+                self._process = subprocess.Popen(
+                    [
+                        "aplay",
+                        "-q",
+                        "-t",
+                        "raw",
+                        "-f",
+                        "S16_LE",
+                        "-c",
+                        str(PCM_CHANNELS),
+                        "-r",
+                        str(PCM_RATE),
+                        "-",
+                    ],
+                    stdin=subprocess.PIPE,
+                )
+            except OSError:
+                self._process = None
+                raise AudioError("cannot start aplay")
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except OSError:
+            self.close()
+            raise AudioError("audio output failed")
+
+    def close(self):
+        """Close sink."""
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+            self._process.wait()
+            self._process = None
+
+
+def make_sink(name, wav_path=None):
+    """Create sink from configuration.
+
+    Args
+    ----
+    name: str
+       One of "alsa", "wav" or "null"
+    wav_path: str
+       Output file for the "wav" sink
+    """
+    if name == "alsa":
+        return AlsaSink()
+    if name == "wav":
+        return WavFileSink(wav_path)
+    if name == "null":
+        return NullSink()
+
+    raise AudioError("unknown audio sink: {}".format(name))
+
+
+class AudioWorker(StoppableThread):
+    """Plays sounds from a queue through a single sink.
+
+    Decoded PCM data is kept in a least recently used cache bounded in
+    bytes; files can be decoded in advance while the worker is idle.
+    Playlists are rendered into a single buffer, cached the same way, and
+    played back without gaps.
+    """
+
+    def __init__(self, sink, cache_size=DEFAULT_CACHE_SIZE):
+        """Initialize.
+
+        Args
+        ----
+        sink: AudioSink
+           Audio destination
+        cache_size: int
+           Maximum amount of decoded audio kept in memory, in bytes
+        """
+        super().__init__()
+        self._sink = sink
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._preload = deque()
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._cached_bytes = 0
+
+    def preload(self, path):
+        """Decode file in advance."""
+        with self._cond:
+            if path not in self._cache:
+                self._preload.append(path)
+                self._cond.notify()
+
+    def invalidate(self, path):
+        """Drop cached data for a file that changed."""
+        with self._cond:
+            for key in list(self._cache):
+                if key == path or (isinstance(key, tuple) and path in key):
+                    self._cached_bytes -= len(self._cache.pop(key))
+
+    def play(self, path, done_cb=None, requested=None):
+        """Queue file or playlist for playback.
+
+        Args
+        ----
+        path: str or tuple
+           Audio file, or tuple of files to play back to back
+        done_cb: callable
+           Called without arguments once playback is over
+        requested: float
+           Monotonic time of the event that caused playback
+        """
+        if requested is None:
+            requested = time.monotonic()
+        with self._cond:
+            self._queue.append((path, done_cb, requested))
+            self._cond.notify()
+
+    def stop(self):
+        """Stop worker."""
+        super().stop()
+        with self._cond:
+            self._cond.notify()
+
+    def _cache_get(self, key):
+        with self._cond:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+            return data
+
+    def _cache_put(self, key, data):
+        with self._cond:
+            if key in self._cache or len(data) > self._cache_size:
+                return
+            self._cache[key] = data
+            self._cached_bytes += len(data)
+            while self._cached_bytes > self._cache_size:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+    def _get_pcm(self, path):
+        """Get PCM data, decoding if not cached."""
+        data = self._cache_get(path)
+        if data is not None:
+            return data
+
+        if isinstance(path, tuple):
+            data = b"".join(self._get_pcm(item) for item in path)
+        else:
+            data = decode_pcm(path)
+        self._cache_put(path, data)
+
+        return data
+
+    def _play(self, path, requested):
+        try:
+            data = self._get_pcm(path)
+        except AudioError as ex:
+            AUDIO_LOGGER.error("could not play SFX: {}".format(ex))
+            return
+
+        started = None
+        for offset in range(0, len(data), _CHUNK_SIZE):
+            if self.is_stopped():
+                break
+            try:
+                self._sink.write(data[offset : offset + _CHUNK_SIZE])
+            except AudioError as ex:
+                AUDIO_LOGGER.error("could not play SFX: {}".format(ex))
+                break
+            if offset == 0:
+                started = time.monotonic()
+                METRICS.observe("sfx.latency", started - requested)
+
+        if started is not None and self._sink.realtime:
+            # the sink buffers data, wait until it has been played out
+            duration = len(data) / (PCM_RATE * PCM_FRAME_SIZE)
+            remaining = started + duration - time.monotonic()
+            if remaining > 0:
+                self.stop_flag.wait(remaining)
+
+    def run(self):
+        """Run worker."""
+        while not self.is_stopped():
+            with self._cond:
+                while (
+                    not self._queue
+                    and not self._preload
+                    and not self.is_stopped()
+                ):
+                    self._cond.wait()
+                if self.is_stopped():
+                    break
+                if self._queue:
+                    item = self._queue.popleft()
+                    preload = None
+                else:
+                    item = None
+                    preload = self._preload.popleft()
+
+            if preload is not None:
+                try:
+                    self._get_pcm(preload)
+                except AudioError as ex:
+                    AUDIO_LOGGER.warning("cannot preload: {}".format(ex))
+                continue
+
+            path, done_cb, requested = item
+            self._play(path, requested)
+            if done_cb is not None:
+                done_cb()
+
+        self._sink.close()
@@ -10,6 +10,16 @@ _SCOREBOARD_DEFAULTS = {
     "chainball_server": "",
     "chainball_server_token": "",
     "implicit_announce": False,
+    "batch_events": False,
+    "live_batch_size": 32,
+    "live_flush_interval": 1.0,
+    "audio_sink": "alsa",
+    "audio_wav_path": "sfx.wav",
+    "audio_cache_size": 32 * 1024 * 1024,
+    "rf_irq_pin": None,
+    "rf_poll_interval": 0.1,
+    "rf_spi_pacing": None,
+    "remote_flush_interval": 10.0,
 }
 
 _DB_DEFAULTS = {
@@ -18,6 +28,10 @@ _DB_DEFAULTS = {
     "tournament_registry": "tournament_registry.json",
     "game_registry": "game_registry.json",
     "announce_registry": "announce_registry.json",
+    "persist_journal": True,
+    "persist_fsync_batch": 1,
+    "persist_history_cache": 16,
+    "central_outbox": "central_outbox.sqlite",
 }
 
 _CONFIGURATION_DEFAULTS = {
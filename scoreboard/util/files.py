@@ -0,0 +1,35 @@
+"""File utilities."""
+
+import json
+import os
+
+
+def write_json(path, data, indent=None):
+    """Replace a JSON file atomically.
+
+    Data is written to a temporary file and forced to disk before it
+    replaces the original, so that a crash leaves either the old or the new
+    file in place, never a truncated one.
+
+    Args
+    ----
+    path: str
+       File path
+    data: object
+       JSON serializable data
+    indent: int
+       Indentation, None for compact output
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as tmp_file:
+        json.dump(data, tmp_file, indent=indent)
+        tmp_file.flush()
+        os.fsync(tmp_file.fileno())
+    os.replace(tmp_path, path)
+
+    # make the rename itself durable
+    folder = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(folder)
+    finally:
+        os.close(folder)
@@ -0,0 +1,104 @@
+"""Runtime metrics."""
+
+import threading
+from collections import deque
+
+_DEFAULT_SAMPLES = 256
+
+
+class MetricsRegistry:
+    """Counters and sample windows for performance metrics."""
+
+    def __init__(self, samples=_DEFAULT_SAMPLES):
+        """Initialize.
+
+        Args
+        ----
+        samples: int
+           How many recent samples are kept per observed metric
+        """
+        self._lock = threading.Lock()
+        self._samples = samples
+        self._counters = {}
+        self._observations = {}
+
+    def increment(self, name, amount=1):
+        """Increment a counter.
+
+        Args
+        ----
+        name: str
+           Metric name
+        amount: int
+           Increment
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """Record a sample.
+
+        Args
+        ----
+        name: str
+           Metric name
+        value: float
+           Sample value, times are in seconds
+        """
+        with self._lock:
+            window = self._observations.get(name)
+            if window is None:
+                window = deque(maxlen=self._samples)
+                self._observations[name] = window
+            window.append(value)
+
+    def counter(self, name):
+        """Get counter value."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def samples(self, name):
+        """Get recent samples for a metric."""
+        with self._lock:
+            return list(self._observations.get(name, []))
+
+    @staticmethod
+    def percentile(values, pct):
+        """Get percentile of a sorted list of values."""
+        if not values:
+            return None
+        idx = int(round((pct / 100.0) * (len(values) - 1)))
+        return values[idx]
+
+    def summary(self):
+        """Get all metrics."""
+        with self._lock:
+            counters = dict(self._counters)
+            observations = {
+                name: sorted(window)
+                for name, window in self._observations.items()
+            }
+
+        summary = {"counters": counters, "observations": {}}
+        for name, values in observations.items():
+            if not values:
+                continue
+            summary["observations"][name] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": self.percentile(values, 50),
+                "p90": self.percentile(values, 90),
+                "p99": self.percentile(values, 99),
+                "max": values[-1],
+            }
+
+        return summary
+
+    def reset(self):
+        """Clear all metrics."""
+        with self._lock:
+            self._counters = {}
+            self._observations = {}
+
+
+METRICS = MetricsRegistry()
@@ -4,6 +4,9 @@ from scoreboard.util.musicplayer import MusicPlayer, MusicPlayerException
 import requests
 import json
 
+# request timeout, in seconds
+_MOPIDY_TIMEOUT = 2.0
+
 
 class MopidyError(MusicPlayerException):
     """Mopidy control error."""
@@ -13,7 +16,7 @@ class MopidyPlayer(MusicPlayer):
     """Mopidy music player."""
 
     @property
-    def is_playing():
+    def is_playing(self):
         """Check if currently playing."""
         json_data = {
             "method": "core.playback.get_state",
@@ -28,6 +31,7 @@ class MopidyPlayer(MusicPlayer):
                 "http://127.0.0.1:6680/mopidy/rpc",
                 headers={"Content-Type": "application/json"},
                 data=payload,
+                timeout=_MOPIDY_TIMEOUT,
             )
         except requests.exceptions.ConnectionError:
             raise MopidyError("request failed")
@@ -39,7 +43,7 @@ class MopidyPlayer(MusicPlayer):
 
         return ret.json()["result"] == "playing"
 
-    def pause():
+    def pause(self):
         """Play."""
         json_data = {
             "method": "core.playback.pause",
@@ -54,6 +58,7 @@ class MopidyPlayer(MusicPlayer):
                 "http://127.0.0.1:6680/mopidy/rpc",
                 headers={"Content-Type": "application/json"},
                 data=payload,
+                timeout=_MOPIDY_TIMEOUT,
             )
         except requests.exceptions.ConnectionError:
             raise MopidyError("request failed")
@@ -63,7 +68,7 @@ class MopidyPlayer(MusicPlayer):
         if ret.status_code != 200:
             raise MopidyError("request failed")
 
-    def play():
+    def play(self):
         """Play."""
         json_data = {
             "method": "core.playback.play",
@@ -78,6 +83,7 @@ class MopidyPlayer(MusicPlayer):
                 "http://127.0.0.1:6680/mopidy/rpc",
                 headers={"Content-Type": "application/json"},
                 data=payload,
+                timeout=_MOPIDY_TIMEOUT,
             )
         except requests.exceptions.ConnectionError:
             raise MopidyError("request failed")
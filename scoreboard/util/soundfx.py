@@ -4,9 +4,16 @@ import base64
 import logging
 import os
 import threading
+import time
 from collections import deque
 
 import pkg_resources
+from scoreboard.util.audio import (
+    DEFAULT_CACHE_SIZE,
+    AudioError,
+    AudioWorker,
+    make_sink,
+)
 from scoreboard.util.configfiles import (
     CHAINBALL_CONFIGURATION,
     ChainBallConfigurationError,
@@ -14,17 +21,8 @@ from scoreboard.util.configfiles import (
 from scoreboard.util.musicplayer import MusicPlayerException
 from scoreboard.util.mopidy import MopidyPlayer
 from scoreboard.util.mpris import LocalPlayer
-from scoreboard.util.spotify import (
-    SpotifyError,
-    get_spotify_play_state,
-)
-
-# sound hack on rpi
-if CHAINBALL_CONFIGURATION.scoreboard.get("use_omx", False):
-    from subprocess import CalledProcessError, check_call
-else:
-    from playsound import playsound
-
+from scoreboard.util.threads import StoppableThread
+from scoreboard.util.wakeup import GAME_WAKEUP, WakeupSources
 
 SFX_LOGGER = logging.getLogger("sboard.sfx")
 
@@ -33,16 +31,17 @@ class SFXDataError(Exception):
     """SFX data error."""
 
 
-class GameSoundEffect(threading.Thread):
-    """Thread that plays a sound."""
+class GameSoundEffect:
+    """Sound effect, played by the audio worker."""
 
-    def __init__(self, fxobj, idx=1, control_spotify=True):
+    def __init__(self, fxobj, idx=1, control_spotify=True, audio=None):
         """Initialize."""
-        super().__init__()
         self.fx = fxobj
         self.finished = False
         self._idx = idx
         self._spotify = control_spotify
+        self._audio = audio
+        self._requested = time.monotonic()
 
     @property
     def control_spotify(self):
@@ -54,27 +53,86 @@ class GameSoundEffect(threading.Thread):
         """Get index."""
         return self._idx
 
-    def run(self):
-        """Play SFX."""
-        if self.fx is None:
-            self.finished = True
+    def start(self):
+        """Queue SFX for playback."""
+        if self.fx is None or self._audio is None:
+            self._done()
             return
 
-        if CHAINBALL_CONFIGURATION.scoreboard.use_omx:
-            try:
-                check_call(["omxplayer", "--no-keys", "-o", "local", self.fx])
-            except CalledProcessError:
-                SFX_LOGGER.error("could not play SFX: {}".format(self.fx))
-        else:
-            try:
-                playsound(self.fx)
-            except Exception as ex:
-                SFX_LOGGER.error(
-                    "could not play SFX: {}, got: {}".format(self.fx, ex)
-                )
+        self._audio.play(self.fx, self._done, self._requested)
 
+    def _done(self):
         self.finished = True
-        # end
+        GAME_WAKEUP.post(WakeupSources.SFX)
+
+
+class PlaybackControlWorker(StoppableThread):
+    """Music player control in the background.
+
+    Requests to the music player are made from this thread so that the
+    game loop never waits on the network. Pause and resume requests set the
+    desired player state, so only the latest one is carried out.
+    """
+
+    def __init__(self, player=None):
+        """Initialize.
+
+        Args
+        ----
+        player: MusicPlayer
+           Player to control, None for no control
+        """
+        super().__init__()
+        self._player = player
+        self._cond = threading.Condition()
+        self._pause_requested = None
+        self._paused_by_sboard = False
+
+    def pause_player(self):
+        """Pause music player if playing."""
+        self._request_state(True)
+
+    def resume_player(self):
+        """Resume music player if paused by the scoreboard."""
+        self._request_state(False)
+
+    def _request_state(self, pause):
+        with self._cond:
+            self._pause_requested = pause
+            self._cond.notify()
+
+    def stop(self):
+        """Stop worker."""
+        super().stop()
+        with self._cond:
+            self._cond.notify()
+
+    def _control_player(self, pause):
+        if self._player is None:
+            return
+        try:
+            if pause:
+                if self._player.is_playing:
+                    self._player.pause()
+                    self._paused_by_sboard = True
+            elif self._paused_by_sboard:
+                if self._player.is_playing is False:
+                    self._player.play()
+                self._paused_by_sboard = False
+        except MusicPlayerException:
+            SFX_LOGGER.warning("could not control music player")
+
+    def run(self):
+        """Run worker."""
+        while not self.is_stopped():
+            with self._cond:
+                while self._pause_requested is None and not self.is_stopped():
+                    self._cond.wait()
+                pause = self._pause_requested
+                self._pause_requested = None
+
+            if pause is not None:
+                self._control_player(pause)
 
 
 class GameSFXHandlerStates:
@@ -91,11 +149,28 @@ class GameSFXHandler:
         """Initialize."""
         self.state = GameSFXHandlerStates.IDLE
         self.current_fx = None
-        self._paused_by_sboard = False
 
         self._fx_queue = deque()
         self._has_audio = True
-        self._resume_spotify_playback = False
+        self._preloaded = set()
+        scoreboard_config = CHAINBALL_CONFIGURATION.scoreboard
+        if "use_omx" in scoreboard_config:
+            SFX_LOGGER.warning(
+                "use_omx is no longer supported, set audio_sink instead"
+            )
+        try:
+            sink = make_sink(
+                scoreboard_config.get("audio_sink", "alsa"),
+                scoreboard_config.get("audio_wav_path"),
+            )
+            self._audio = AudioWorker(
+                sink,
+                scoreboard_config.get("audio_cache_size", DEFAULT_CACHE_SIZE),
+            )
+        except AudioError as ex:
+            SFX_LOGGER.error("cannot set up audio: {}".format(ex))
+            self._audio = None
+            self._has_audio = False
 
         # build library
         self.fx_dict = {}
@@ -108,6 +183,21 @@ class GameSFXHandler:
             self._player = LocalPlayer()
         else:
             self._player = None
+        self._control = PlaybackControlWorker(self._player)
+
+    def start(self):
+        """Start audio output and music player control."""
+        if self._audio is not None:
+            self._audio.start()
+        self._control.start()
+
+    def stop(self):
+        """Stop audio output and music player control."""
+        if self._audio is not None:
+            self._audio.stop()
+            self._audio.join()
+        self._control.stop()
+        self._control.join()
 
     def _load_sfx_data(self):
         try:
@@ -148,18 +238,28 @@ class GameSFXHandler:
         self.fx_data_path = sfx_path
 
         SFX_LOGGER.debug("loaded {} SFX files".format(len(self.fx_dict)))
+        self.preload(*self._preloaded)
+
+    def preload(self, *fx_list):
+        """Decode SFX in advance so that they play without delay.
+
+        Args
+        ----
+        fx_list: str
+           Names of SFX that are played by game events
+        """
+        self._preloaded.update(fx_list)
+        if self._audio is None:
+            return
+        for fx in fx_list:
+            if fx in self.fx_dict:
+                self._audio.preload(self.fx_dict[fx])
 
     def play_fx(self, *fx_list):
-        """Play SFX."""
+        """Queue SFX for playback, without blocking."""
         if self._has_audio is False:
             SFX_LOGGER.warning("no audio device, cannot play sfx")
             return
-        # return
-        try:
-            spotify_playing = get_spotify_play_state()
-        except SpotifyError:
-            # ignore
-            spotify_playing = False
         offset = 0
         for idx, fx in enumerate(fx_list):
             if fx in self.fx_dict:
@@ -169,7 +269,7 @@ class GameSFXHandler:
                         GameSoundEffect(
                             self.fx_dict[fx],
                             len(fx_list) - idx + offset,
-                            control_spotify=spotify_playing,
+                            audio=self._audio,
                         )
                     )
                 )
@@ -178,6 +278,24 @@ class GameSFXHandler:
                 offset += 1
                 continue
 
+        GAME_WAKEUP.post(WakeupSources.SFX)
+
+    def play_playlist(self, *fx_list):
+        """Queue SFX to be played back to back as a single sound."""
+        if self._has_audio is False:
+            SFX_LOGGER.warning("no audio device, cannot play sfx")
+            return
+        playlist = tuple(
+            self.fx_dict[fx] for fx in fx_list if fx in self.fx_dict
+        )
+        if not playlist:
+            return
+
+        self._fx_queue.append(
+            GameSoundEffect(playlist, audio=self._audio)
+        )
+        GAME_WAKEUP.post(WakeupSources.SFX)
+
     def handle(self):
         """Handle play state machine."""
         if self.current_fx is not None and not self.current_fx.finished:
@@ -190,29 +308,12 @@ class GameSFXHandler:
             # next_fx.start()
         except IndexError:
             # queue is empty
+            if self.state == GameSFXHandlerStates.PLAYING:
+                self._control.resume_player()
             self.state = GameSFXHandlerStates.IDLE
-            if (
-                self._player is not None
-                and self.current_fx is not None
-                and self._paused_by_sboard
-            ):
-                try:
-                    if self._player.is_playing is False:
-                        self._player.play()
-                        self._paused_by_sboard = False
-                except MusicPlayerException:
-                    pass
             return
 
-        # first try to get spotify state
-        if self._player is not None:
-            try:
-                if self._player.is_playing:
-                    self._player.pause()
-                    self._paused_by_sboard = True
-            except MusicPlayerException:
-                pass
-
+        self._control.pause_player()
         next_fx.start()
 
     def get_available_sfx(self):
@@ -236,6 +337,8 @@ class GameSFXHandler:
                 sfx_data_file.write(sfx_data_bytes)
         except OSError:
             raise SFXDataError("cannot save SFX data")
+        if self._audio is not None:
+            self._audio.invalidate(sfx_dest_path)
 
         self.fx_desc[fx_name] = "SFX_{}".format(fx_name)
         CHAINBALL_CONFIGURATION.sfx.sfxlib[fx_name] = {
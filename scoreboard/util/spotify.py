@@ -3,23 +3,35 @@
 import requests
 from scoreboard.util.configfiles import CHAINBALL_CONFIGURATION
 
+# request timeout, in seconds
+_SPOTIFY_TIMEOUT = 2.0
+
 
 class SpotifyError(Exception):
     """Spotify communication error."""
 
 
-def get_spotify_play_state():
-    """Get current state."""
+def _spotify_get(path):
+    """Make a request to the player API."""
+    spotify_token = CHAINBALL_CONFIGURATION.scoreboard.get("spotify_token")
+    if not spotify_token:
+        raise SpotifyError("no token configured")
 
-    spotify_token = CHAINBALL_CONFIGURATION.scoreboard.spotify_token
     try:
-        ret = requests.get(
-            "https://api.spotify.com/v1/me/player",
+        return requests.get(
+            "https://api.spotify.com/v1/me/player{}".format(path),
             headers={"Authorization": "Bearer {}".format(spotify_token)},
+            timeout=_SPOTIFY_TIMEOUT,
         )
-    except ConnectionError:
+    except requests.exceptions.RequestException:
         raise SpotifyError("request failed")
 
+
+def get_spotify_play_state():
+    """Get current state."""
+
+    ret = _spotify_get("")
+
     if ret.status_code != 200:
         # failed
         raise SpotifyError("request failed")
@@ -36,14 +48,7 @@ def get_spotify_play_state():
 def pause_spotify():
     """Pause playback."""
 
-    spotify_token = CHAINBALL_CONFIGURATION.scoreboard.spotify_token
-    try:
-        ret = requests.get(
-            "https://api.spotify.com/v1/me/player/pause",
-            headers={"Authorization": "Bearer {}".format(spotify_token)},
-        )
-    except ConnectionError:
-        raise SpotifyError("request failed")
+    ret = _spotify_get("/pause")
 
     if ret.status_code != 204:
         raise SpotifyError("request failed")
@@ -52,14 +57,7 @@ def pause_spotify():
 def play_spotify():
     """Resume playback."""
 
-    spotify_token = CHAINBALL_CONFIGURATION.scoreboard.spotify_token
-    try:
-        ret = requests.get(
-            "https://api.spotify.com/v1/me/player/play",
-            headers={"Authorization": "Bearer {}".format(spotify_token)},
-        )
-    except ConnectionError:
-        raise SpotifyError("request failed")
+    ret = _spotify_get("/play")
 
     if ret.status_code != 204:
         raise SpotifyError("request failed")
@@ -0,0 +1,120 @@
+"""Game loop wakeup queue."""
+
+import heapq
+import threading
+import time
+from collections import deque
+
+# wake slightly after deadlines so that strict timeout comparisons have passed
+_DEADLINE_SLACK = 0.002
+
+
+class WakeupSources:
+    """Things that wake the game loop up."""
+
+    REMOTE = "remote"
+    IPC = "ipc"
+    SFX = "sfx"
+    ANNOUNCE = "announce"
+    STOP = "stop"
+
+
+class WakeupQueue:
+    """Single queue where game activity and timer deadlines are posted.
+
+    Producers (other threads) post a source whenever something needs to be
+    processed, and components schedule deadlines for things that must happen
+    at a later time. The game thread sleeps in wait() until either occurs.
+    """
+
+    def __init__(self):
+        """Initialize."""
+        self._cond = threading.Condition()
+        self._sources = deque()
+        self._deadlines = []
+
+    def post(self, source=None):
+        """Wake the game loop up.
+
+        Args
+        ----
+        source: str
+           What caused the wakeup, see WakeupSources
+        """
+        with self._cond:
+            self._sources.append(source)
+            self._cond.notify_all()
+
+    def schedule_at(self, deadline):
+        """Wake the game loop up at a point in time.
+
+        Args
+        ----
+        deadline: float
+           Deadline in time.monotonic() seconds
+        """
+        with self._cond:
+            heapq.heappush(self._deadlines, deadline + _DEADLINE_SLACK)
+            self._cond.notify_all()
+
+    def schedule_in(self, delay):
+        """Wake the game loop up after a delay.
+
+        Args
+        ----
+        delay: float
+           Delay in seconds
+        """
+        self.schedule_at(time.monotonic() + max(delay, 0))
+
+    def next_deadline(self):
+        """Get earliest scheduled deadline."""
+        with self._cond:
+            if not self._deadlines:
+                return None
+            return self._deadlines[0]
+
+    def wait(self, timeout=None):
+        """Wait for activity or a deadline.
+
+        Args
+        ----
+        timeout: float
+           Maximum time to wait in seconds, None waits indefinitely
+
+        Returns the list of sources posted since the last call, which is
+        empty if woken up by a deadline or the timeout.
+        """
+        if timeout is not None:
+            give_up = time.monotonic() + timeout
+        else:
+            give_up = None
+
+        with self._cond:
+            while True:
+                if self._sources:
+                    sources = list(self._sources)
+                    self._sources.clear()
+                    return sources
+
+                now = time.monotonic()
+                expired = False
+                while self._deadlines and self._deadlines[0] <= now:
+                    heapq.heappop(self._deadlines)
+                    expired = True
+                if expired:
+                    return []
+
+                wait_time = None
+                if self._deadlines:
+                    wait_time = self._deadlines[0] - now
+                if give_up is not None:
+                    if now >= give_up:
+                        return []
+                    if wait_time is None or give_up - now < wait_time:
+                        wait_time = give_up - now
+
+                self._cond.wait(wait_time)
+
+
+GAME_WAKEUP = WakeupQueue()
@@ -0,0 +1,62 @@
+import threading
+import wave
+
+from scoreboard.util.audio import (
+    PCM_CHANNELS,
+    PCM_RATE,
+    PCM_SAMPLE_WIDTH,
+    AudioWorker,
+    WavFileSink,
+)
+
+
+def test_audio_worker(tmp_path):
+
+    source = str(tmp_path / "fx.wav")
+    frames = bytes(range(256)) * 64
+    with wave.open(source, "wb") as wav:
+        wav.setnchannels(PCM_CHANNELS)
+        wav.setsampwidth(PCM_SAMPLE_WIDTH)
+        wav.setframerate(PCM_RATE)
+        wav.writeframes(frames)
+
+    output = str(tmp_path / "out.wav")
+    worker = AudioWorker(WavFileSink(output))
+    worker.preload(source)
+    worker.start()
+
+    done = threading.Semaphore(0)
+    worker.play(source, done.release)
+    # playlist, rendered as a single sound
+    worker.play((source, source), done.release)
+    assert done.acquire(timeout=5)
+    assert done.acquire(timeout=5)
+    worker.stop()
+    worker.join()
+
+    with wave.open(output, "rb") as wav:
+        assert wav.readframes(wav.getnframes()) == frames * 3
+
+
+def test_audio_cache_limit(tmp_path):
+
+    sources = []
+    for idx in range(3):
+        source = str(tmp_path / "fx{}.wav".format(idx))
+        with wave.open(source, "wb") as wav:
+            wav.setnchannels(PCM_CHANNELS)
+            wav.setsampwidth(PCM_SAMPLE_WIDTH)
+            wav.setframerate(PCM_RATE)
+            wav.writeframes(bytes([idx]) * 1024)
+        sources.append(source)
+
+    # room for two files, least recently used one is evicted
+    worker = AudioWorker(WavFileSink(str(tmp_path / "out.wav")), 2048)
+    worker._get_pcm(sources[0])
+    worker._get_pcm(sources[1])
+    worker._get_pcm(sources[0])
+    worker._get_pcm(sources[2])
+    assert list(worker._cache) == [sources[0], sources[2]]
+
+    worker.invalidate(sources[0])
+    assert list(worker._cache) == [sources[2]]
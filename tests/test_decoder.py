@@ -0,0 +1,22 @@
+import struct
+
+import pytest
+
+from scoreboard.remote.constants import RemoteCommands
+from scoreboard.remote.decoder import RemoteDecoder
+
+
+def test_decode():
+
+    payload = struct.pack("<IBB", 0xA1B2C3D4, RemoteCommands.BTN_PRESS, 1)
+    payload += bytes(32 - len(payload))
+    for message in (payload, memoryview(b"\x00" + payload)[1:]):
+        decoded = RemoteDecoder(message)
+        assert decoded.remote_id == 0xA1B2C3D4
+        assert decoded.command == RemoteCommands.BTN_PRESS
+        assert decoded.cmd_data == 1
+
+    with pytest.raises(IOError):
+        RemoteDecoder(bytes(32))
+    with pytest.raises(IOError):
+        RemoteDecoder(payload[:5])
@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import struct
+
+import pytest
+
+from scoreboard.remote.constants import RemoteCommands
+from scoreboard.util.configfiles import CHAINBALL_CONFIGURATION
+
+# the engine needs the desktop bus for music player control
+pytest.importorskip("dbus")
+
+CONF_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "conf")
+PLAYER_REMOTES = [0x51000, 0x51001]
+MASTER_REMOTE = 0x52000
+
+
+def remote_payload(remote_id, command, data):
+    packet = struct.pack("<IBB", remote_id, command, data)
+    return packet + bytes(32 - len(packet))
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+
+    conf = str(tmp_path / "conf")
+    shutil.copytree(CONF_PATH, conf)
+    for name, values in (
+        ("scoreboard.json", {"audio_sink": "null", "live_updates": False}),
+        ("db.json", {"database_location": str(tmp_path / "db")}),
+    ):
+        path = os.path.join(conf, name)
+        with open(path, "r") as fobj:
+            data = json.load(fobj)
+        data.update(values)
+        with open(path, "w") as fobj:
+            json.dump(data, fobj)
+    CHAINBALL_CONFIGURATION.reload_configuration(conf)
+    monkeypatch.chdir(tmp_path)
+
+    from scoreboard.game.engine import MASTER_REMOTE_ROUTE, ChainballGame
+    from scoreboard.game.playertxt import PlayerText
+    from scoreboard.ipc.server import IPC_HANDLER
+
+    IPC_HANDLER.start_handler()
+    game = ChainballGame(virtual_hw=True, remote_score=True)
+    game.register_players({0: PlayerText("P0"), 1: PlayerText("P1")})
+    for player, remote_id in enumerate(PLAYER_REMOTES):
+        game.pair_end(player, remote_id)
+    game.pair_end(MASTER_REMOTE_ROUTE, MASTER_REMOTE)
+    yield game
+    game.shutdown()
+    IPC_HANDLER.stop_handler()
+
+
+def test_burst_ends_game(game):
+
+    from scoreboard.remote.persistence import PERSISTENT_REMOTE_DATA
+
+    game.game_begin()
+    game.players[0].current_score = 4
+    # winning press, a press that comes too late and a battery report
+    for payload in (
+        remote_payload(PLAYER_REMOTES[0], RemoteCommands.BTN_PRESS, 0),
+        remote_payload(PLAYER_REMOTES[1], RemoteCommands.BTN_PRESS, 0),
+        remote_payload(PLAYER_REMOTES[1], RemoteCommands.BATT, 42),
+    ):
+        game.rf_handler._message_callback(payload)
+    game.game_loop()
+
+    assert not game.ongoing
+    assert game.players[0].current_score == 5
+    assert game.players[1].current_score == 0
+    # the rest of the burst was still handled
+    assert not game.rf_handler.message_pending()
+    remotes = PERSISTENT_REMOTE_DATA.get_remote_persist()
+    assert remotes[hex(PLAYER_REMOTES[1])] == 42
@@ -0,0 +1,49 @@
+import json
+
+from scoreboard.game.history import GameHistory
+
+
+def _write_game(path, uuid, state="FINISHED", winner=0):
+
+    game = {
+        "start_time": "2020-01-01 00:00:00",
+        "game_state": state,
+        "events": [{"evt_type": "GAME_END", "evt_desc": {"winner": winner}}],
+        "player_data": {"0": {"display_name": "a", "username": None}},
+        "game_data": {"internal_id": 1, "user_id": None},
+    }
+    with open(str(path / (uuid + ".json")), "w") as data:
+        json.dump(game, data)
+
+
+def test_history(tmp_path):
+
+    for uuid in ("000000", "000001", "000002"):
+        _write_game(tmp_path, uuid)
+    (tmp_path / "game.json").write_text('{"current_series": 3}')
+
+    history = GameHistory(str(tmp_path), cache_size=1)
+    history.load()
+    assert len(history) == 3
+    assert "game" not in history
+    assert history.index["000001"]["winner"] == 0
+    assert (tmp_path / "index.json").exists()
+
+    # lazy loading, LRU eviction
+    assert history["000000"]["game_state"] == "FINISHED"
+    history["000001"]
+    assert list(history._cache) == ["000001"]
+
+    try:
+        history["999999"]
+        raise AssertionError
+    except KeyError:
+        pass
+
+    # incremental update picks up modified files only
+    _write_game(tmp_path, "000002", state="RUNNING", winner=None)
+    (tmp_path / "000000.json").unlink()
+    history = GameHistory(str(tmp_path))
+    history.load()
+    assert "000000" not in history
+    assert history.index["000002"]["game_state"] == "RUNNING"
@@ -0,0 +1,28 @@
+from scoreboard.game.journal import GameJournal, GameJournalRecords
+
+
+def test_journal(tmp_path):
+
+    path = str(tmp_path / "000000.journal")
+    journal = GameJournal(path, fsync_batch=2)
+    journal.append({"kind": GameJournalRecords.SCORE, "player": 0, "score": 1})
+    journal.append({"kind": GameJournalRecords.USER_ID, "user_id": "id"})
+    journal.close()
+
+    # reopen and append
+    journal = GameJournal(path)
+    journal.append({"kind": GameJournalRecords.EVENT, "event": {}})
+    journal.close()
+
+    # simulate interrupted write
+    with open(path, "a") as data:
+        data.write('{"kind": "sco')
+
+    records = GameJournal.read(path)
+    assert len(records) == 3
+    assert records[0]["score"] == 1
+    assert records[2]["kind"] == GameJournalRecords.EVENT
+
+    journal = GameJournal(path)
+    journal.close(remove=True)
+    assert not (tmp_path / "000000.journal").exists()
@@ -0,0 +1,33 @@
+from scoreboard.announce.matrixser import (
+    Color,
+    CommandType,
+    MessageEncoder,
+    SerialMessage,
+)
+
+
+def test_message_encoder():
+
+    encoder = MessageEncoder(size=4)
+    text = SerialMessage(
+        CommandType.TEXT, [1, 2, Color(3, 4, 5), "ab", 1, True]
+    )
+    end = SerialMessage(CommandType.END, [])
+    assert bytes(encoder.encode([text, end])) == bytes(
+        [13, CommandType.TEXT, 1, 2, 3, 4, 5, 2, 97, 98, 1, 1, 0xFF]
+        + [3, CommandType.END, 0xFF]
+    )
+
+
+def test_message_encoder_field_types():
+
+    # same command and field count, different field types
+    encoder = MessageEncoder()
+    as_byte = SerialMessage(CommandType.FILL, [7])
+    as_color = SerialMessage(CommandType.FILL, [Color(1, 2, 3)])
+    assert bytes(encoder.encode([as_byte])) == bytes(
+        [4, CommandType.FILL, 7, 0xFF]
+    )
+    assert bytes(encoder.encode([as_color])) == bytes(
+        [6, CommandType.FILL, 1, 2, 3, 0xFF]
+    )
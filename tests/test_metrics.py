@@ -0,0 +1,25 @@
+from scoreboard.util.metrics import MetricsRegistry
+
+
+def test_metrics():
+
+    metrics = MetricsRegistry(samples=10)
+    metrics.increment("count")
+    metrics.increment("count", 2)
+    assert metrics.counter("count") == 3
+
+    for value in range(20):
+        metrics.observe("latency", value)
+
+    # only the most recent samples are kept
+    assert metrics.samples("latency") == list(range(10, 20))
+
+    summary = metrics.summary()
+    assert summary["counters"]["count"] == 3
+    latency = summary["observations"]["latency"]
+    assert latency["count"] == 10
+    assert latency["max"] == 19
+    assert latency["p50"] in (14, 15)
+
+    metrics.reset()
+    assert metrics.summary() == {"counters": {}, "observations": {}}
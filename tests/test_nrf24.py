@@ -0,0 +1,75 @@
+import time
+
+import scoreboard.remote.nrf24const as rf
+from scoreboard.remote.nrf24 import NRF24Chip, NRF24Handler
+
+
+def test_simulated_irq():
+
+    handler = NRF24Handler(fake_hw=True, poll_interval=10)
+    handler.start()
+
+    start = time.monotonic()
+    handler.chip.simulate_rx(bytes(32))
+    message = handler.msg_q.get(timeout=1)
+    # woken up by the IRQ, not by polling
+    assert time.monotonic() - start < 0.5
+    assert message.payload == bytes(32)
+
+    handler.stop()
+    handler.join(timeout=1)
+    assert not handler.is_alive()
+
+
+class FakeSPI:
+    """Chip with packets waiting in the RX FIFO."""
+
+    def __init__(self, packets):
+        self.fifo = list(packets)
+        self.transactions = 0
+
+    def status(self):
+        if self.fifo:
+            return rf.STATUS_RX_DR
+        return rf.STATUS_RX_P_NO_RX_FIFO_EMPTY
+
+    def xfer2(self, data):
+        self.transactions += 1
+        status = self.status()
+        if data[0] == rf.CMD_R_PAY and self.fifo:
+            return [status] + self.fifo.pop(0)
+        return [status] + [0] * (len(data) - 1)
+
+
+def test_batched_reception():
+
+    received = []
+    chip = NRF24Chip(0, 0, received.append, fake_hw=True)
+    chip.fake_hw = False
+    chip.spi_dev = FakeSPI([[1] * 32, [2] * 32])
+
+    chip.poll()
+    assert [bytes(payload) for payload in received] == [
+        bytes([1] * 32),
+        bytes([2] * 32),
+    ]
+    # status, one read per packet and the read that finds the FIFO empty
+    assert chip.spi_dev.transactions == 4
+
+    # idle poll is a single transaction
+    chip.poll()
+    assert chip.spi_dev.transactions == 5
+
+
+def test_receive_all():
+
+    handler = NRF24Handler(fake_hw=True)
+    for payload in (b"\x01", b"\x02", b"\x03"):
+        handler._message_callback(payload)
+    messages = handler.receive_all()
+    assert [message.payload for message in messages] == [
+        b"\x01",
+        b"\x02",
+        b"\x03",
+    ]
+    assert not handler.message_pending()
@@ -0,0 +1,70 @@
+import time
+
+from scoreboard.cbcentral.outbox import PostOutbox
+
+
+def test_outbox(tmp_path):
+
+    path = str(tmp_path / "outbox.sqlite")
+    outbox = PostOutbox(path)
+    outbox.push({"payload": "a"}, "api", "first/")
+    outbox.push({"payload": "b"}, "api", "second/", retry=False)
+    outbox.push({"payload": "c"}, "api", "third/")
+    assert len(outbox) == 3
+
+    # a failed request is backed off, others still go through
+    first, second, third = outbox.ready(10)
+    outbox.fail([first, second])
+    assert [item.path for item in outbox.ready(10)] == ["third/"]
+
+    # requests persist until acknowledged
+    resumed = PostOutbox(path)
+    assert len(resumed) == 2
+    resumed.ack(resumed.ready(10))
+    assert len(resumed) == 1
+
+
+def test_outbox_queue_order(tmp_path, monkeypatch):
+
+    monkeypatch.setattr("scoreboard.cbcentral.outbox._MAX_ATTEMPTS", 2)
+    outbox = PostOutbox(str(tmp_path / "outbox.sqlite"))
+    outbox.push({}, "api", "games/1/start_game/", queue="games/1")
+    outbox.push({}, "api", "games/1/push_event/", queue="games/1")
+    outbox.push({}, "api", "games/2/start_game/", queue="games/2")
+
+    # a failure holds back the rest of its queue only
+    outbox.fail(outbox.ready(1))
+    assert [item.path for item in outbox.ready(10)] == ["games/2/start_game/"]
+
+    # after too many failures the request goes to the dead letter table
+    later = time.time() + 10
+    monkeypatch.setattr(time, "time", lambda: later)
+    outbox.fail(outbox.ready(1))
+    assert outbox.dead_letters() == 1
+    assert [item.path for item in outbox.ready(10)] == [
+        "games/1/push_event/",
+        "games/2/start_game/",
+    ]
+
+
+def test_outbox_outage(tmp_path, monkeypatch):
+
+    outbox = PostOutbox(str(tmp_path / "outbox.sqlite"))
+    outbox.push({}, "api", "games/1/start_game/", queue="games/1")
+    outbox.push({}, "api", "games/1/stop_game/", queue="games/1")
+
+    # server unreachable for hours, requests are kept and stay in order
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    for _ in range(100):
+        now += 300
+        pending = outbox.ready(10)
+        assert [item.path for item in pending] == [
+            "games/1/start_game/",
+            "games/1/stop_game/",
+        ]
+        outbox.defer(pending[:1])
+        assert outbox.ready(10) == []
+
+    assert outbox.dead_letters() == 0
+    assert len(outbox) == 2
@@ -0,0 +1,37 @@
+import json
+import os
+
+from scoreboard.remote.persistence import RemotePersistence
+
+
+def test_remote_persistence(tmpdir):
+
+    path = os.path.join(str(tmpdir), "persist", "remote.json")
+    persist = RemotePersistence(path, history_size=2)
+    persist.seen(0x1234)
+    persist.add_remote(0x1234)
+    for level in (90, 80, 80):
+        persist.upd_data(0x1234, level)
+
+    # nothing written until flushed
+    assert not os.path.exists(path)
+    persist.flush()
+    with open(path) as f:
+        assert json.load(f) == {"0x1234": 80}
+
+    # unchanged values are not written again
+    os.remove(path)
+    persist.upd_data(0x1234, 80)
+    persist.flush()
+    assert not os.path.exists(path)
+
+    telemetry = persist.get_telemetry()["0x1234"]
+    assert telemetry["battery"] == 80
+    assert [level for _, level in telemetry["history"]] == [80, 80]
+    assert telemetry["last_seen"] is not None
+
+    # pending changes are saved on stop
+    persist.start(60.0)
+    persist.upd_data(0x1234, 70)
+    persist.stop()
+    assert RemotePersistence(path).get_remote_persist() == {"0x1234": 70}
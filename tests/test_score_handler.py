@@ -0,0 +1,86 @@
+import pytest
+
+from scoreboard.score.constants import PlayerScoreCommands as cmd
+from scoreboard.score.handler import ScoreHandler
+
+T = cmd.TERM
+
+
+class FakePort:
+    """Serial port that records writes."""
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+
+
+@pytest.fixture
+def handler():
+    handler = ScoreHandler(None, virt_hw=True)
+    handler.ser_port = FakePort()
+    return handler
+
+
+def test_coalesce_last_state(handler):
+
+    handler.register_player(0, "P0")
+    handler.register_player(1, "P1")
+    for score in (1, 2, 3):
+        handler.update_score(0, score)
+    handler.update_score(1, -1)
+    handler.set_turn(0)
+    handler.set_turn(1)
+    handler.blink_start(1)
+    handler.blink_stop(1)
+    handler.set_panel_text(0, "PLAYER0")
+    handler.process_queue(block=False)
+
+    # a single write with the last command of each kind per player
+    assert handler.ser_port.writes == [
+        bytes([1, cmd.MODE, 1, T, 1, cmd.DATA, 2])
+        + b"P1"
+        + bytes([T, 0, cmd.SCORE, 13, T, 1, cmd.SCORE, 9, T])
+        + bytes([1, cmd.TURN, T, 1, cmd.BLINK, 0x04, T])
+        + bytes([0, cmd.MODE, 1, T, 0, cmd.DATA, 7])
+        + b"PLAYER0"
+        + bytes([T])
+    ]
+
+
+def test_coalesce_reregister(handler):
+
+    handler.register_player(0, "OLD")
+    handler.update_score(0, 2)
+    handler.set_turn(0)
+    handler.unregister_player(0)
+    handler.set_turn(1)
+    handler.register_player(0, "NEW")
+    handler.update_score(0, -3)
+    handler.process_queue(block=False)
+
+    # the panel is cleared before it shows the new player
+    assert handler.ser_port.writes == [
+        bytes([0, cmd.CLR, T, 1, cmd.TURN, T, 0, cmd.MODE, 1, T])
+        + bytes([0, cmd.DATA, 3])
+        + b"NEW"
+        + bytes([T, 0, cmd.SCORE, 7, T])
+    ]
+
+
+def test_coalesce_unregister_last(handler):
+
+    handler.register_player(2, "P2")
+    handler.update_score(2, 4)
+    handler.unregister_player(2)
+    handler.update_score(3, 1)
+    handler.process_queue(block=False)
+
+    # commands before the clear are kept, the panel ends up cleared
+    assert handler.ser_port.writes == [
+        bytes([2, cmd.MODE, 1, T, 2, cmd.DATA, 2])
+        + b"P2"
+        + bytes([T, 2, cmd.SCORE, 14, T, 2, cmd.CLR, T])
+        + bytes([3, cmd.SCORE, 11, T])
+    ]
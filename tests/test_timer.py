@@ -0,0 +1,68 @@
+from scoreboard.announce.clock import GameClock
+from scoreboard.announce.timer import TimerAnnouncement, TimerHandler
+
+
+def test_timer_render():
+
+    timer = TimerHandler(GameClock(), rgbmat=True)
+    timer.draw(19, 59)
+    full = timer.matCli.bytes_sent
+
+    # only the seconds change
+    timer.draw(19, 58)
+    partial = timer.matCli.bytes_sent - full
+    assert 0 < partial < full
+
+    # nothing changes
+    sent = timer.matCli.bytes_sent
+    timer.draw(19, 58)
+    assert timer.matCli.bytes_sent == sent
+
+
+def test_timer_announcement():
+
+    timer = TimerHandler(GameClock(), rgbmat=True)
+    timer.a_msg = TimerAnnouncement("Game", "START")
+    start = timer.matCli.bytes_sent
+    timer.draw_announcement()
+    sent = timer.matCli.bytes_sent - start
+    assert sent > 0
+
+    # already showing
+    timer.draw_announcement()
+    assert timer.matCli.bytes_sent - start == sent
+
+    # timer replaces the announcement, then it is shown again from cache
+    timer.draw(19, 59)
+    drawn = timer.matCli.bytes_sent
+    timer.draw_announcement()
+    assert timer.matCli.bytes_sent - drawn == sent
+    assert len(timer._announcements) == 1
+
+
+def test_timer_clock():
+
+    clock = GameClock()
+    timer = TimerHandler(clock, rgbmat=True)
+    ptimer = TimerHandler(clock, rgbmat=False)
+    clock.start(1)
+    clock.pause()
+    assert 59.9 < clock.get_remaining_seconds() <= 60
+    assert clock.get_remaining_time() == (1, 0)
+
+    # a second is displayed until it has fully elapsed
+    clock.pause_timer = 58.5
+    assert clock.get_remaining_seconds() == 58.5
+    assert clock.get_remaining_time() == (0, 59)
+
+    # next cycle when the remaining time reaches a whole second
+    clock.unpause()
+    assert abs(clock.timer_end - clock.next_tick - 58) < 1e-6
+
+    # announcements are queued per display
+    ptimer.announcement(TimerAnnouncement("", "+1"), 1)
+    assert ptimer.active and not timer.active
+
+    clock.stop()
+    assert clock.active
+    assert 58 < clock.get_remaining_seconds() <= 58.5
@@ -0,0 +1,33 @@
+import threading
+import time
+
+from scoreboard.util.wakeup import WakeupQueue, WakeupSources
+
+
+def test_wakeup():
+
+    wakeup = WakeupQueue()
+
+    # posted sources are drained at once
+    wakeup.post(WakeupSources.REMOTE)
+    wakeup.post(WakeupSources.IPC)
+    assert wakeup.wait(0) == [WakeupSources.REMOTE, WakeupSources.IPC]
+
+    # timeout
+    start = time.monotonic()
+    assert wakeup.wait(0.05) == []
+    assert time.monotonic() - start >= 0.05
+
+    # deadline wakes before timeout
+    start = time.monotonic()
+    wakeup.schedule_in(0.05)
+    assert wakeup.wait(5) == []
+    elapsed = time.monotonic() - start
+    assert 0.05 <= elapsed < 1
+    assert wakeup.next_deadline() is None
+
+    # post from another thread
+    timer = threading.Timer(0.05, wakeup.post, args=(WakeupSources.SFX,))
+    timer.start()
+    assert wakeup.wait(5) == [WakeupSources.SFX]
+    timer.join()